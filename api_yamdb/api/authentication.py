@@ -0,0 +1,283 @@
+import copy
+import datetime as dt
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from reviews.models import TokenRevocation, User
+
+ROLE_CLAIM = 'role'
+SUPERUSER_CLAIM = 'is_superuser'
+
+
+class RoleRefreshToken(RefreshToken):
+    """Токен с ролью и флагом суперпользователя в подписанных claims.
+
+    Access-токен из него получает те же claims.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[SUPERUSER_CLAIM] = user.is_superuser
+        return token
+
+
+class UserCache:
+    """Пользователи по id в памяти процесса на `USER_CACHE_TTL` секунд.
+
+    Сохранение или удаление пользователя сбрасывает запись в этом процессе,
+    в остальных она устаревает по сроку или по отзыву токенов. Каждый
+    запрос получает свою копию объекта, чтобы правки в одном запросе
+    не были видны другим.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, user_id, loaded_after=None):
+        """Пользователь из кэша, загруженный не раньше `loaded_after`."""
+        entry = self.entries.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        expires, user, loaded_at = entry
+        if loaded_after is not None and loaded_at <= loaded_after:
+            return None
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        now = time.monotonic()
+        with self.lock:
+            if len(self.entries) >= settings.USER_CACHE_SIZE:
+                self.entries = {
+                    key: entry for key, entry in self.entries.items()
+                    if entry[0] >= now
+                }
+                if len(self.entries) >= settings.USER_CACHE_SIZE:
+                    self.entries = {}
+            self.entries[user_id] = (
+                now + settings.USER_CACHE_TTL, copy.copy(user), time.time()
+            )
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+
+
+class RevocationList:
+    """Отозванные роли токенов: {id пользователя: время отзыва}.
+
+    Отзывы других процессов читаются из TokenRevocation по интервалу.
+    """
+
+    # Запас на запись, время которой раньше последней синхронизации,
+    # а транзакция завершилась позже неё.
+    overlap = dt.timedelta(minutes=1)
+
+    def __init__(self):
+        self.revoked = {}
+        self.synced_at = None
+        self.synced_until = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def lifetime():
+        return api_settings.ACCESS_TOKEN_LIFETIME
+
+    def revoke(self, user_id):
+        now = timezone.now()
+        TokenRevocation.objects.update_or_create(
+            user_id=user_id, defaults={'revoked_at': now}
+        )
+        TokenRevocation.objects.filter(
+            revoked_at__lt=now - self.lifetime()
+        ).delete()
+        with self.lock:
+            self.revoked[user_id] = now.timestamp()
+        user_cache.invalidate(user_id)
+
+    def sync(self):
+        now = time.monotonic()
+        if (self.synced_at is not None and now - self.synced_at
+                < settings.TOKEN_REVOCATION_SYNC_INTERVAL):
+            return
+        with self.lock:
+            self.synced_at = now
+            started = timezone.now()
+            since = started - self.lifetime()
+            if self.synced_until is not None:
+                since = max(since, self.synced_until - self.overlap)
+            rows = TokenRevocation.objects.filter(
+                revoked_at__gte=since
+            ).values_list('user_id', 'revoked_at')
+            revoked = dict(self.revoked)
+            for user_id, revoked_at in rows:
+                revoked[user_id] = max(
+                    revoked.get(user_id, 0), revoked_at.timestamp()
+                )
+            oldest = (started - self.lifetime()).timestamp()
+            self.revoked = {
+                user_id: revoked_at for user_id, revoked_at in revoked.items()
+                if revoked_at >= oldest
+            }
+            self.synced_until = started
+
+    def revoked_at(self, user_id, issued_at):
+        """Время отзыва, если токен выдан не позже него, иначе None."""
+        self.sync()
+        revoked_at = self.revoked.get(user_id)
+        if revoked_at is None or issued_at is None:
+            return revoked_at
+        return revoked_at if issued_at <= int(revoked_at) else None
+
+    def clear(self):
+        with self.lock:
+            self.revoked = {}
+            self.synced_at = None
+            self.synced_until = None
+
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+
+class TokenCache:
+    """Проверенные токены по строке токена, LRU на `TOKEN_CACHE_SIZE` записей.
+
+    Запись живёт до `exp` токена, который задаёт ACCESS_TOKEN_LIFETIME,
+    после этого токен снова разбирается полностью и отклоняется как
+    истёкший. Каждый запрос получает копию токена с копией claims.
+    Попадания и промахи считаются в `cache_info()`, как у lru_cache.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def copy(token):
+        token = copy.copy(token)
+        token.payload = dict(token.payload)
+        return token
+
+    def get(self, raw_token):
+        with self.lock:
+            entry = self.entries.get(raw_token)
+            if entry is not None and entry[0] <= time.time():
+                del self.entries[raw_token]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(raw_token)
+            self.hits += 1
+        return self.copy(entry[1])
+
+    def set(self, raw_token, token):
+        expires = token.get('exp')
+        if expires is None:
+            return
+        with self.lock:
+            self.entries[raw_token] = (expires, self.copy(token))
+            self.entries.move_to_end(raw_token)
+            while len(self.entries) > settings.TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def cache_info(self):
+        return CacheInfo(
+            self.hits, self.misses, settings.TOKEN_CACHE_SIZE,
+            len(self.entries)
+        )
+
+    def clear(self):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+
+user_cache = UserCache()
+revocations = RevocationList()
+token_cache = TokenCache()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, raw, update_fields, **kwargs):
+    """Запоминает прежние роль и флаг суперпользователя."""
+    instance._previous_role = None
+    if instance.pk is None or raw:
+        return
+    fields = ('role', 'is_superuser')
+    if update_fields is not None and not set(fields) & set(update_fields):
+        return
+    instance._previous_role = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*fields).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    """Отзывает роль в выданных токенах, если она изменилась."""
+    previous = getattr(instance, '_previous_role', None)
+    if previous is not None and previous != (
+            instance.role, instance.is_superuser):
+        revocations.revoke(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revocations.revoke(instance.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT, проверенный токен и его пользователь берутся из кэшей процесса.
+
+    Повторный запрос с тем же токеном не проверяет подпись заново
+    и не обращается к базе за пользователем.
+
+    Если роль пользователя отозвана после выдачи токена, claims роли
+    удаляются из токена, а пользователь перечитывается из базы,
+    если в кэше он загружен до отзыва.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = token_cache.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, token)
+        return token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        revoked_at = revocations.revoked_at(
+            user_id, validated_token.get('iat')
+        )
+        if revoked_at is not None:
+            for claim in (ROLE_CLAIM, SUPERUSER_CLAIM):
+                validated_token.payload.pop(claim, None)
+        user = user_cache.get(user_id, loaded_after=revoked_at)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return user
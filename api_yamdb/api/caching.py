@@ -0,0 +1,160 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+from reviews.versions import get_versions, rating_key, title_key
+
+
+class TitleListCache:
+    """Кэш данных страниц списка произведений в кэше `titles`.
+
+    Ключ — хост и отсортированные параметры запроса (фильтры и страница).
+    Запись хранит версии списка произведений и справочников на момент
+    расчёта и версии каждого произведения со страницы и его рейтинга,
+    поэтому отзыв сбрасывает только страницы с этим произведением.
+    """
+
+    alias = 'titles'
+    structure_keys = ('titles', 'genres', 'categories')
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, request):
+        params = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            for value in values
+        )
+        raw = f'{request.get_host()}?{urlencode(params)}'
+        return 'titles:' + hashlib.sha1(raw.encode()).hexdigest()
+
+    def get(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if get_versions(list(entry['versions'])) != entry['versions']:
+            return None
+        return entry['data']
+
+    def begin(self):
+        """Версии, прочитанные до расчёта страницы."""
+        return get_versions([*self.structure_keys, 'ratings'])
+
+    def set(self, key, data, before):
+        """Сохраняет страницу, если за время расчёта ничего не изменилось.
+
+        Любое изменение произведения или рейтинга сдвигает `titles` или
+        `ratings`, поэтому их совпадение с `before` гарантирует, что
+        прочитанные после расчёта версии произведений соответствуют
+        данным страницы.
+        """
+        data = OrderedDict(data)
+        data['results'] = list(data['results'])
+        versions = get_versions([*before, *(
+            key
+            for item in data['results']
+            for key in (title_key(item['id']), rating_key(item['id']))
+        )])
+        if any(versions[name] != version for name, version in before.items()):
+            return
+        del versions['ratings']
+        self.cache.set(key, {'versions': versions, 'data': data})
+
+
+class TitleDetailCache:
+    """Кэш карточки произведения, пересчёт одной карточки в одном потоке.
+
+    Запись с устаревшим рейтингом отдаётся, пока пересчёт идёт в фоне.
+    """
+
+    alias = 'titles'
+    poll_interval = 0.01
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version_keys(self, pk):
+        return [title_key(pk), rating_key(pk), 'genres', 'categories']
+
+    def get(self, pk, compute, allow_stale=True):
+        """Данные карточки и признак того, что они устарели.
+
+        `compute(pk)` строит данные карточки или возвращает None,
+        если произведения нет.
+        """
+        key = f'title-detail:{pk}'
+        versions = get_versions(self.version_keys(pk))
+        entry = self.cache.get(key)
+        if entry is not None:
+            if entry['versions'] == versions:
+                return entry['data'], False
+            if allow_stale and self.in_grace_period(pk, entry, versions):
+                self.refresh_in_background(key, pk, compute)
+                return entry['data'], True
+        return self.compute_once(key, pk, compute, versions), False
+
+    def in_grace_period(self, pk, entry, versions):
+        changed = {
+            name for name, version in versions.items()
+            if entry['versions'].get(name) != version
+        }
+        if changed != {rating_key(pk)}:
+            return False
+        old_number, old_modified = entry['versions'][rating_key(pk)]
+        number, modified = versions[rating_key(pk)]
+        return number > old_number and (
+            time.time() - modified.timestamp()
+            < settings.TITLE_DETAIL_GRACE_PERIOD
+        )
+
+    def lock(self, key):
+        return self.cache.add(
+            f'{key}:lock', os.getpid(), settings.TITLE_DETAIL_LOCK_TIMEOUT
+        )
+
+    def unlock(self, key):
+        self.cache.delete(f'{key}:lock')
+
+    def store(self, key, pk, compute):
+        versions = get_versions(self.version_keys(pk))
+        data = compute(pk)
+        if data is not None:
+            self.cache.set(key, {'versions': versions, 'data': data})
+        return data
+
+    def compute_once(self, key, pk, compute, versions):
+        deadline = time.monotonic() + settings.TITLE_DETAIL_WAIT
+        while not self.lock(key):
+            if time.monotonic() >= deadline:
+                return compute(pk)
+            time.sleep(self.poll_interval)
+            entry = self.cache.get(key)
+            if entry is not None and entry['versions'] == versions:
+                return entry['data']
+        try:
+            return self.store(key, pk, compute)
+        finally:
+            self.unlock(key)
+
+    def refresh_in_background(self, key, pk, compute):
+        if not self.lock(key):
+            return
+
+        def refresh():
+            try:
+                self.store(key, pk, compute)
+            finally:
+                self.unlock(key)
+                connection.close()
+
+        threading.Thread(target=refresh, daemon=True).start()
@@ -0,0 +1,45 @@
+import json
+import zlib
+
+from reviews.models import Comments, Review
+from .readers import CommentsReader, ReviewReader
+
+CHUNK_SIZE = 1000
+
+
+def review_lines(title_id, chunk_size=None):
+    """Отзывы произведения с комментариями построчно в формате NDJSON.
+
+    Отзывы и комментарии читаются двумя потоковыми выборками,
+    упорядоченными по id отзыва, и сливаются на лету.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    reviews = ReviewReader().stream(
+        Review.objects.filter(title_id=title_id).order_by('id'), chunk_size
+    )
+    comments = CommentsReader().stream(
+        Comments.objects.filter(review__title_id=title_id).order_by(
+            'review_id', 'id'
+        ),
+        chunk_size
+    )
+    comment = next(comments, None)
+    for review in reviews:
+        review['comments'] = []
+        while comment is not None and comment['review'] <= review['id']:
+            if comment['review'] == review['id']:
+                review['comments'].append(comment)
+            comment = next(comments, None)
+        yield json.dumps(
+            review, ensure_ascii=False, separators=(',', ':')
+        ).encode() + b'\n'
+
+
+def gzip_stream(chunks, level=6):
+    """Сжимает поток байтов в gzip по мере чтения."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -1,15 +1,58 @@
 import django_filters
 
-from reviews.models import Title
+from reviews.models import Comments, Review, Title
 
 
 class TitleFilter(django_filters.FilterSet):
-    """Фильтрация по слагам категориии/жанра, названию произведения и году."""
+    """Фильтрация по слагам категориии/жанра, названию произведения и году.
+
+    `search` — полнотекстовый поиск по названию и описанию.
+    """
 
     category = django_filters.CharFilter(field_name='category__slug')
     genre = django_filters.CharFilter(field_name='genre__slug')
     name = django_filters.CharFilter(field_name='name', lookup_expr='contains')
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ['category', 'genre', 'name', 'year']
+        fields = ['category', 'genre', 'name', 'year', 'search']
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        return queryset.search(value)
+
+
+class ReviewSearchFilter(django_filters.FilterSet):
+    """Полнотекстовый поиск `q` по тексту отзыва.
+
+    Фильтры по id произведения, нику автора и интервалу дат
+    `pub_date_after`/`pub_date_before`.
+    """
+
+    q = django_filters.CharFilter(method='filter_search')
+    title = django_filters.NumberFilter(field_name='title_id')
+    author = django_filters.CharFilter(field_name='author__username')
+    pub_date = django_filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = Review
+        fields = ['q', 'title', 'author', 'pub_date']
+
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+
+class CommentsSearchFilter(ReviewSearchFilter):
+    """Полнотекстовый поиск `q` по тексту комментария.
+
+    Фильтры по id произведения и отзыва, нику автора и интервалу дат
+    `pub_date_after`/`pub_date_before`.
+    """
+
+    title = django_filters.NumberFilter(field_name='review__title_id')
+    review = django_filters.NumberFilter(field_name='review_id')
+
+    class Meta:
+        model = Comments
+        fields = ['q', 'title', 'review', 'author', 'pub_date']
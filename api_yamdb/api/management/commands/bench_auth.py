@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import (CachedJWTAuthentication, token_cache,
+                                user_cache)
+from api.views import get_tokens_for_user
+from reviews.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость аутентификации одного запроса с JWT без '
+        'кэшей, с кэшем пользователей и с кэшем проверенных токенов. '
+        'Пользователи создаются во временной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Сколько разных токенов чередуется в запросах.'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            requests = self.make_requests(
+                options['clients'], options['requests']
+            )
+            plain = self.measure(JWTAuthentication(), requests)
+            cached = CachedJWTAuthentication()
+            user_cache.clear()
+            token_cache.clear()
+            without_tokens = self.measure(
+                cached, requests, before_each=token_cache.clear
+            )
+            token_cache.clear()
+            with_tokens = self.measure(cached, requests)
+            info = token_cache.cache_info()
+            transaction.set_rollback(True)
+        self.report('JWTAuthentication', plain, plain)
+        self.report('кэш пользователей', without_tokens, plain)
+        self.report('кэш пользователей и токенов', with_tokens, plain)
+        self.stdout.write(
+            f'токены: попаданий {info.hits}, промахов {info.misses}, '
+            f'доля попаданий {info.hits / (info.hits + info.misses):.1%}'
+        )
+
+    def make_requests(self, clients, count):
+        User.objects.bulk_create(
+            User(username=f'bench-auth-{index}',
+                 email=f'bench-auth-{index}@yamdb.fake')
+            for index in range(clients)
+        )
+        factory = APIRequestFactory()
+        headers = [
+            'Bearer ' + get_tokens_for_user(user)['access']
+            for user in User.objects.filter(username__startswith='bench-auth-')
+        ]
+        return [
+            factory.get('/', HTTP_AUTHORIZATION=headers[index % clients])
+            for index in range(count)
+        ]
+
+    def measure(self, authentication, requests, before_each=None):
+        started = time.perf_counter()
+        for request in requests:
+            if before_each is not None:
+                before_each()
+            authentication.authenticate(request)
+        return (time.perf_counter() - started) / len(requests)
+
+    def report(self, name, elapsed, baseline):
+        self.stdout.write(
+            f'{name}: {elapsed * 1e6:.1f} мкс/запрос, '
+            f'ускорение x{baseline / elapsed:.1f}'
+        )
@@ -0,0 +1,91 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.readers import CommentsReader, ReviewReader, TitleReader
+from api.serializers import (CommentsSerializer, ReviewSerializer,
+                             TitleSerializer)
+from reviews.models import Category, Comments, Genre, Review, Title, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость строки списка через сериализатор и через '
+        'чтение .values(). Данные создаются во временной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.fill(options['rows'])
+            for name, queryset, serializer_class, reader in (
+                ('titles', Title.objects.select_related(
+                    'category').prefetch_related('genre'),
+                 TitleSerializer, TitleReader()),
+                ('reviews', Review.objects.select_related('author'),
+                 ReviewSerializer, ReviewReader()),
+                ('comments', Comments.objects.select_related('author'),
+                 CommentsSerializer, CommentsReader()),
+            ):
+                serializer_time = self.measure(
+                    lambda: serializer_class(queryset.all(), many=True).data,
+                    options['repeat']
+                )
+                reader_time = self.measure(
+                    lambda: reader.read(reader.values(queryset.all())),
+                    options['repeat']
+                )
+                self.report(
+                    name, options['rows'], serializer_time, reader_time
+                )
+            transaction.set_rollback(True)
+
+    def fill(self, rows):
+        author = User.objects.create(
+            username='bench-author', email='bench-author@yamdb.fake'
+        )
+        category = Category.objects.create(name='Бенчмарк', slug='bench')
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {index}', slug=f'bench-{index}')
+            for index in range(3)
+        )
+        genres = list(Genre.objects.filter(slug__startswith='bench-'))
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {index}', year=2000, category=category,
+                  description='Описание', score_sum=7, review_count=1)
+            for index in range(rows)
+        )
+        titles = list(Title.objects.filter(category=category))
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title_id=title.id, genre_id=genre.id)
+            for title in titles for genre in genres
+        )
+        Review.objects.bulk_create(
+            Review(text='Отзыв', score=7, author=author, title=title)
+            for title in titles
+        )
+        Comments.objects.bulk_create(
+            Comments(text='Комментарий', author=author, review=review)
+            for review in Review.objects.filter(author=author)
+        )
+
+    def measure(self, build, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            build()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def report(self, name, rows, serializer_time, reader_time):
+        self.stdout.write(
+            f'{name}: сериализатор '
+            f'{serializer_time / rows * 1e6:.1f} мкс/строка, '
+            f'values {reader_time / rows * 1e6:.1f} мкс/строка, '
+            f'ускорение x{serializer_time / reader_time:.1f}'
+        )
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.outbox import deliver
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди пачками, каждая пачка — через одно '
+        'соединение с почтовым сервером. Без --loop завершается, когда '
+        'писем, которым пора уйти, не осталось.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, проверяя очередь каждые --interval с.'
+        )
+        parser.add_argument('--interval', type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = deliver(options['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(
+            f'Отправлено писем: {total_sent}, не отправлено: {total_failed}'
+        )
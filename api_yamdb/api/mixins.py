@@ -0,0 +1,134 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from reviews.versions import get_versions
+
+
+class ConditionalGetMixin:
+    """ETag и Last-Modified для list и retrieve по счётчикам версий.
+
+    Тег собирается из адреса запроса, формата ответа и номеров версий
+    `get_version_keys()`, поэтому совпавший If-None-Match получает 304
+    без запроса к выборке и без сериализации.
+    """
+
+    version_keys = ()
+
+    def get_version_keys(self):
+        return list(self.version_keys)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_etag(self, request, versions):
+        parts = [request.get_full_path(), request.accepted_media_type or '']
+        parts += [f'{key}={versions[key]}' for key in sorted(versions)]
+        return quote_etag(hashlib.sha1('\n'.join(parts).encode()).hexdigest())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions = get_versions(self.get_version_keys())
+        etag = self.get_etag(request, versions)
+        last_modified = max(
+            (modified for number, modified in versions.values() if modified),
+            default=None
+        )
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200 or getattr(
+                    response, 'is_stale', False):
+                return response
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class CachedListMixin:
+    """Список из кэша `list_cache`, если версии его данных не изменились."""
+
+    list_cache = None
+
+    def list(self, request, *args, **kwargs):
+        key = self.list_cache.make_key(request)
+        data = self.list_cache.get(key)
+        if data is not None:
+            return Response(data)
+        before = self.list_cache.begin()
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.list_cache.set(key, response.data, before)
+        return response
+
+
+class ValuesListMixin:
+    """list по строкам `.values()` через `list_reader` вместо сериализатора.
+
+    Фильтры и пагинация применяются к той же выборке, что и раньше,
+    остальные действия по-прежнему работают через сериализатор.
+    """
+
+    list_reader = None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.list_reader.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.list_reader.read(page))
+        return Response(self.list_reader.read(rows))
+
+
+class CachedRetrieveMixin:
+    """Объект из кэша `detail_cache`.
+
+    Устаревшую копию получают только анонимные запросы без If-None-Match
+    и If-Modified-Since.
+    """
+
+    detail_cache = None
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        data, is_stale = self.detail_cache.get(
+            lookup, self.get_detail_data,
+            allow_stale=self.allow_stale(request)
+        )
+        if data is None:
+            raise NotFound()
+        response = Response(data)
+        response.is_stale = is_stale
+        return response
+
+    def allow_stale(self, request):
+        return not (
+            request.user.is_authenticated
+            or 'HTTP_IF_NONE_MATCH' in request.META
+            or 'HTTP_IF_MODIFIED_SINCE' in request.META
+        )
+
+    def get_detail_data(self, lookup):
+        try:
+            instance = self.get_queryset().filter(
+                **{self.lookup_field: lookup}
+            ).first()
+        except (TypeError, ValueError):
+            return None
+        if instance is None:
+            return None
+        return self.get_serializer_class()(instance).data
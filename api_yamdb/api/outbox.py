@@ -0,0 +1,87 @@
+import datetime as dt
+import smtplib
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from reviews.models import OutgoingEmail
+
+
+def enqueue(subject, body, from_email, to):
+    """Кладёт письмо в очередь, запрос не ждёт почтового сервера."""
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, from_email=from_email, to=to
+    )
+
+
+def claim(batch_size):
+    """Забирает пачку писем, которым пора уйти, на время аренды.
+
+    Пачка помечается уникальным сроком аренды, поэтому другой процесс
+    с той же очередью эти письма не возьмёт. Если процесс упадёт, письма
+    снова станут доступны, когда аренда истечёт.
+    """
+    now = timezone.now()
+    due = OutgoingEmail.objects.filter(next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at', 'id').values_list(
+        'id', flat=True
+    )[:batch_size])
+    if not ids:
+        return []
+    lease = now + dt.timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+    due.filter(pk__in=ids).update(next_attempt_at=lease)
+    return list(
+        OutgoingEmail.objects.filter(pk__in=ids, next_attempt_at=lease)
+    )
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой: удваивается с каждой неудачей."""
+    return dt.timedelta(seconds=min(
+        settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_MAX_RETRY_DELAY
+    ))
+
+
+def fail(email, error):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    email.next_attempt_at = (
+        timezone.now() + retry_delay(email.attempts)
+        if email.attempts < settings.EMAIL_OUTBOX_MAX_ATTEMPTS else None
+    )
+    email.save(update_fields=('attempts', 'last_error', 'next_attempt_at'))
+
+
+def deliver(batch_size):
+    """Отправляет одну пачку писем через одно соединение с сервером.
+
+    Возвращает (отправлено, не отправлено). Неотправленные письма
+    получают следующую попытку с растущей паузой.
+    """
+    emails = claim(batch_size)
+    sent = []
+    failed = {}
+    try:
+        with get_connection() as connection:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, [email.to],
+                    connection=connection
+                )
+                try:
+                    message.send()
+                except (smtplib.SMTPException, OSError) as error:
+                    failed[email.pk] = error
+                else:
+                    sent.append(email.pk)
+    except (smtplib.SMTPException, OSError) as error:
+        for email in emails:
+            if email.pk not in sent:
+                failed.setdefault(email.pk, error)
+    OutgoingEmail.objects.filter(pk__in=sent).delete()
+    for email in emails:
+        if email.pk in failed:
+            fail(email, failed[email.pk])
+    return len(sent), len(failed)
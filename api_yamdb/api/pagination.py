@@ -0,0 +1,174 @@
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Курсор — значения всех полей `ordering` у крайней строки страницы.
+
+    Последнее поле `ordering` должно быть уникальным.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    ordering = ()
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        reverse, position = self.decode_cursor(request)
+        ordering = self.invert(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(ordering, position))
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = rows
+        return rows
+
+    @staticmethod
+    def invert(ordering):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in ordering
+        ]
+
+    @staticmethod
+    def after(ordering, position):
+        """Условие «строго после позиции» в порядке `ordering`."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        return condition
+
+    def fields(self):
+        return [name.lstrip('-') for name in self.ordering]
+
+    def get_position(self, row):
+        return [
+            row[field] if isinstance(row, dict) else getattr(row, field)
+            for field in self.fields()
+        ]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode())
+            position = [
+                self.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields(), data['p'])
+            ]
+            if len(position) != len(self.ordering) or None in position:
+                raise ValueError
+            return bool(data['r']), position
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, reverse, row):
+        position = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in self.get_position(row)
+        ]
+        encoded = b64encode(
+            json.dumps({'r': int(reverse), 'p': position}).encode()
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(False, self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(True, self.page[0])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с переключением на курсорную.
+
+    При `?pagination=cursor` страницы выбираются по ключу `ordering`
+    без COUNT и OFFSET. Выборка с другим порядком, например по
+    релевантности поиска, всегда отдаётся постранично.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    ordering = None
+
+    cursor_paginator = None
+
+    def get_cursor_paginator(self):
+        paginator = KeysetPagination()
+        paginator.ordering = self.ordering
+        paginator.page_size = self.page_size
+        return paginator
+
+    def has_own_order(self, queryset):
+        order_by = tuple(queryset.query.order_by)
+        return bool(order_by) and order_by != tuple(self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = request.query_params.get(self.mode_query_param)
+        if mode != self.cursor_mode or self.has_own_order(queryset):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.get_cursor_paginator()
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class PubDatePagination(OptionalCursorPagination):
+    """Отзывы и комментарии: от новых к старым, при равной дате по id."""
+
+    ordering = ('-pub_date', 'id')
+
+
+class TitlePagination(OptionalCursorPagination):
+    """Произведения: от новых к старым, при равном годе по id."""
+
+    ordering = ('-year', 'id')
+
+
+class PubDateCursorPagination(KeysetPagination):
+    """Всегда курсорная пагинация от новых к старым, при равной дате по id."""
+
+    ordering = ('-pub_date', 'id')
@@ -1,9 +1,42 @@
 from rest_framework import permissions
 
+from reviews.models import User
+from .authentication import ROLE_CLAIM, SUPERUSER_CLAIM
+
+
+def get_role(request):
+    """Роль и флаг суперпользователя из claims токена.
+
+    Для токена без claims роли (выданного раньше или с отозванной ролью)
+    они берутся у пользователя.
+    """
+    token = request.auth
+    if token is not None and ROLE_CLAIM in token:
+        return token[ROLE_CLAIM], token.get(SUPERUSER_CLAIM, False)
+    return request.user.role, request.user.is_superuser
+
+
+def is_admin(request):
+    role, is_superuser = get_role(request)
+    return is_superuser or role == User.ADMIN
+
+
+def is_moderator(request):
+    return get_role(request)[0] == User.MODERATOR
+
 
 class Admin(permissions.BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.is_admin
+        return request.user.is_authenticated and is_admin(request)
+
+
+class Moderator(permissions.BasePermission):
+    """Модераторы и админы."""
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            is_moderator(request) or is_admin(request)
+        )
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -13,7 +46,7 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         if not request.user.is_authenticated:
             return request.method in permissions.SAFE_METHODS
         return (request.method in permissions.SAFE_METHODS
-                or request.user.is_admin)
+                or is_admin(request))
 
 
 class ReviewCommentPermission(permissions.BasePermission):
@@ -26,6 +59,6 @@ class ReviewCommentPermission(permissions.BasePermission):
             return True
         if not request.user.is_authenticated:
             return False
-        return (obj.author == request.user
-                or request.user.is_moderator
-                or request.user.is_admin)
+        return (obj.author_id == request.user.id
+                or is_moderator(request)
+                or is_admin(request))
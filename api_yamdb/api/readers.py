@@ -0,0 +1,129 @@
+from collections import OrderedDict, defaultdict
+from itertools import islice
+from operator import itemgetter
+
+from rest_framework import serializers
+
+from reviews.models import Title
+
+
+def datetime_field(column):
+    """Дата в том же формате, что и DateTimeField сериализатора."""
+    get = itemgetter(column)
+    to_representation = serializers.DateTimeField().to_representation
+
+    def extract(row):
+        value = get(row)
+        return None if value is None else to_representation(value)
+    return extract
+
+
+class ValuesReader:
+    """Данные списка из строк `.values()` без моделей и полей DRF.
+
+    `columns` — поля выборки, `extractors` — пары (ключ ответа,
+    функция от строки) в порядке полей соответствующего сериализатора,
+    чтобы ответ совпадал с ним побайтно.
+    """
+
+    columns = ()
+    extractors = ()
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def get_extractors(self, rows):
+        return self.extractors
+
+    def read(self, rows):
+        rows = list(rows)
+        extractors = self.get_extractors(rows)
+        return [
+            OrderedDict([(name, extract(row)) for name, extract in extractors])
+            for row in rows
+        ]
+
+    def stream(self, queryset, chunk_size=1000):
+        """Все строки выборки через iterator(), в памяти один чанк."""
+        rows = self.values(queryset).iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield from self.read(chunk)
+
+
+class TitleReader(ValuesReader):
+    """Повторяет TitleSerializer, жанры страницы — одним запросом."""
+
+    columns = (
+        'id', 'name', 'year', 'description', 'score_sum', 'review_count',
+        'category_id', 'category__name', 'category__slug'
+    )
+
+    @staticmethod
+    def category(row):
+        if row['category_id'] is None:
+            return None
+        return OrderedDict(
+            [('name', row['category__name']), ('slug', row['category__slug'])]
+        )
+
+    @staticmethod
+    def rating(row):
+        if row['review_count']:
+            return row['score_sum'] // row['review_count']
+
+    def get_genres(self, rows):
+        genres = defaultdict(list)
+        if not rows:
+            return genres
+        links = Title.genre.through.objects.filter(
+            title_id__in=[row['id'] for row in rows]
+        ).order_by('genre__name').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        )
+        for title_id, name, slug in links:
+            genres[title_id].append(
+                OrderedDict([('name', name), ('slug', slug)])
+            )
+        return genres
+
+    def get_extractors(self, rows):
+        genres = self.get_genres(rows)
+        return (
+            ('id', itemgetter('id')),
+            ('category', self.category),
+            ('genre', lambda row: genres.get(row['id'], [])),
+            ('rating', self.rating),
+            ('name', itemgetter('name')),
+            ('year', itemgetter('year')),
+            ('description', itemgetter('description')),
+        )
+
+
+class ReviewReader(ValuesReader):
+    """Повторяет ReviewSerializer, автор — соединением в той же выборке."""
+
+    columns = ('id', 'author__username', 'text', 'pub_date', 'score', 'title')
+    extractors = (
+        ('id', itemgetter('id')),
+        ('author', itemgetter('author__username')),
+        ('text', itemgetter('text')),
+        ('pub_date', datetime_field('pub_date')),
+        ('score', itemgetter('score')),
+        ('title', itemgetter('title')),
+    )
+
+
+class CommentsReader(ValuesReader):
+    """Повторяет CommentsSerializer."""
+
+    columns = ('id', 'author__username', 'text', 'pub_date', 'review')
+    extractors = (
+        ('id', itemgetter('id')),
+        ('author', itemgetter('author__username')),
+        ('text', itemgetter('text')),
+        ('pub_date', datetime_field('pub_date')),
+        ('review', itemgetter('review')),
+    )
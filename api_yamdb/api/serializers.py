@@ -1,10 +1,48 @@
 import datetime as dt
+from collections import Counter, defaultdict
 
-from django.db.models import Avg
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
+from rest_framework.settings import api_settings
 
+from reviews import catalog
+from reviews.autocomplete import INDEXES
 from reviews.models import Category, Comments, Genre, Review, Title, User
+from reviews.versions import bump_many, rating_key, reviews_key, title_key
+
+
+class CatalogSlugRelatedField(SlugRelatedField):
+    """Поиск категории или жанра по слагу в кэше процесса, без запроса к БД.
+
+    Снимок справочника берётся один раз на экземпляр сериализатора.
+    Хранится имя кэша в `reviews.catalog`: DRF копирует аргументы поля
+    для каждого сериализатора, а кэш должен быть общим.
+    """
+
+    def __init__(self, catalog_name, **kwargs):
+        self.catalog_name = catalog_name
+        self.snapshot = None
+        super().__init__(
+            slug_field='slug',
+            queryset=getattr(catalog, catalog_name).model.objects.all(),
+            **kwargs
+        )
+
+    def to_internal_value(self, data):
+        if self.snapshot is None:
+            self.snapshot = getattr(catalog, self.catalog_name).snapshot()
+        try:
+            return self.snapshot.by_slug[smart_str(data)]
+        except KeyError:
+            self.fail(
+                'does_not_exist',
+                slug_name=self.slug_field,
+                value=smart_str(data)
+            )
 
 
 class UserRegistrationSerializer(serializers.Serializer):
@@ -68,28 +106,72 @@ class TitleSerializer(serializers.ModelSerializer):
 
     category = CategorySerilizer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
-    rating = serializers.SerializerMethodField(source='rating')
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
-
-    def get_rating(self, obj):
-        """Получение рейтинга произведения, при его наличии."""
-        rating = obj.reviews.all().aggregate(Avg('score')).get('score__avg')
-        if rating:
-            return int(rating)
+        exclude = ('score_sum', 'review_count')
+
+
+class TitleListSerializer(serializers.ListSerializer):
+    """Создание списка произведений одной транзакцией через bulk_create.
+
+    Категории и жанры всех элементов берутся из одного снимка справочников.
+    Ошибки возвращаются по каждому элементу, при любой ошибке не создаётся
+    ничего.
+    """
+
+    def to_internal_value(self, data):
+        limit = settings.TITLES_BULK_CREATE_LIMIT
+        if isinstance(data, list) and len(data) > limit:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Можно создать не больше {limit} произведений за запрос.'
+                ]
+            })
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        for item in validated_data:
+            item['genre'] = list(dict.fromkeys(item['genre']))
+        with transaction.atomic():
+            titles = Title.objects.bulk_create([
+                Title(**{
+                    name: value for name, value in item.items()
+                    if name != 'genre'
+                })
+                for item in validated_data
+            ])
+            if titles and titles[0].pk is None:
+                # SQLite не возвращает id из bulk_create, но внутри
+                # транзакции запись идёт под блокировкой базы, и id новых
+                # строк AUTOINCREMENT идут подряд до текущего максимума.
+                last = Title.objects.aggregate(last=Max('id'))['last']
+                for pk, title in zip(
+                        range(last - len(titles) + 1, last + 1), titles):
+                    title.pk = pk
+            Title.genre.through.objects.bulk_create([
+                Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genre']
+            ])
+            bump_many([
+                'titles', 'title-names',
+                *(title_key(title.pk) for title in titles),
+            ])
+        for title, item in zip(titles, validated_data):
+            title._prefetched_objects_cache = {'genre': item['genre']}
+        return titles
 
 
 class PostTitleSerializer(TitleSerializer):
     """Сериализатор для POST и UPDATE запросов."""
 
-    category = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Category.objects.all()
-    )
-    genre = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Genre.objects.all(), many=True
-    )
+    category = CatalogSlugRelatedField(catalog_name='categories')
+    genre = CatalogSlugRelatedField(catalog_name='genres', many=True)
+
+    class Meta(TitleSerializer.Meta):
+        list_serializer_class = TitleListSerializer
 
     def validate_year(self, value):
         """Валидатор года выхода произведения."""
@@ -99,6 +181,9 @@ class PostTitleSerializer(TitleSerializer):
         return value
 
 
+REVIEW_NOT_UNIQUE = 'Пользователь уже отправлял отзыв на это произведение.'
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = SlugRelatedField(
         slug_field='username', read_only=True,
@@ -119,21 +204,115 @@ class ReviewSerializer(serializers.ModelSerializer):
             )
         return value
 
-    def validate(self, data):
-        """Проверяем уникальность отзыва."""
-        is_post_request = 'POST' in str(self.context['request'])
-        if not is_post_request:
-            return data
-
-        author = self.context['request'].user
-        title_id = self.context['view'].kwargs['title_id']
-        review_exists = Review.objects.filter(author=author,
-                                              title_id=title_id).exists()
-        if review_exists:
-            raise serializers.ValidationError(
-                'Пользователь уже отправлял отзыв на это произведение.'
-            )
-        return data
+    def create(self, validated_data):
+        """Повторный отзыв отсекает ограничение review_is_unique в базе."""
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [REVIEW_NOT_UNIQUE]
+            })
+
+
+class BulkReviewListSerializer(serializers.ListSerializer):
+    """Пакетная загрузка отзывов одной транзакцией.
+
+    Произведения, авторы и уникальность пар (автор, произведение)
+    проверяются несколькими запросами на весь список. Рейтинг каждого
+    затронутого произведения сдвигается один раз.
+    """
+
+    default_error_messages = {
+        'title': 'Произведение с id={value} не найдено.',
+        'author': 'Пользователь {value} не найден.',
+        'unique': REVIEW_NOT_UNIQUE,
+    }
+
+    def to_internal_value(self, data):
+        limit = settings.REVIEWS_BULK_CREATE_LIMIT
+        if isinstance(data, list) and len(data) > limit:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Можно загрузить не больше {limit} отзывов за запрос.'
+                ]
+            })
+        items = super().to_internal_value(data)
+        titles = set(Title.objects.filter(
+            id__in={item['title'] for item in items}
+        ).values_list('id', flat=True))
+        authors = dict(User.objects.filter(
+            username__in={item['author'] for item in items}
+        ).values_list('username', 'id'))
+        pairs = Counter(
+            (authors.get(item['author']), item['title']) for item in items
+        )
+        existing = set(Review.objects.filter(
+            title_id__in=titles, author_id__in=authors.values()
+        ).values_list('author_id', 'title_id').iterator())
+        errors = []
+        for item in items:
+            error = {}
+            if item['title'] not in titles:
+                error['title'] = [self.error_messages['title'].format(
+                    value=item['title']
+                )]
+            if item['author'] not in authors:
+                error['author'] = [self.error_messages['author'].format(
+                    value=item['author']
+                )]
+            pair = (authors.get(item['author']), item['title'])
+            if not error and (pair in existing or pairs[pair] > 1):
+                error[api_settings.NON_FIELD_ERRORS_KEY] = [
+                    self.error_messages['unique']
+                ]
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        for item in items:
+            item['author_id'] = authors[item.pop('author')]
+            item['title_id'] = item.pop('title')
+        return items
+
+    def create(self, validated_data):
+        deltas = defaultdict(lambda: [0, 0])
+        for item in validated_data:
+            deltas[item['title_id']][0] += item['score']
+            deltas[item['title_id']][1] += 1
+        try:
+            with transaction.atomic():
+                reviews = Review.objects.bulk_create(
+                    Review(**item) for item in validated_data
+                )
+                for title_id, (score_sum, count) in deltas.items():
+                    Title.objects.filter(pk=title_id).change_rating(
+                        score_sum, count
+                    )
+                bump_many(['ratings', *(
+                    key
+                    for title_id in sorted(deltas)
+                    for key in (reviews_key(title_id), rating_key(title_id))
+                )])
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    self.error_messages['unique']
+                ]
+            })
+        return reviews
+
+
+class BulkReviewSerializer(serializers.Serializer):
+    """Отзыв из пакетной загрузки: автор — по нику, дата — необязательна."""
+
+    title = serializers.IntegerField()
+    author = serializers.CharField()
+    text = serializers.CharField()
+    score = serializers.IntegerField(min_value=1, max_value=10)
+    pub_date = serializers.DateTimeField(required=False)
+
+    class Meta:
+        list_serializer_class = BulkReviewListSerializer
 
 
 class CommentsSerializer(serializers.ModelSerializer):
@@ -146,3 +325,13 @@ class CommentsSerializer(serializers.ModelSerializer):
         model = Comments
         fields = '__all__'
         read_only_fields = ('review',)
+
+
+class AutocompleteSerializer(serializers.Serializer):
+    """Параметры запроса подсказок по префиксу названия."""
+
+    q = serializers.CharField()
+    type = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(INDEXES)), required=False
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
@@ -2,8 +2,9 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
-    CategoryViewSet, CommentsViewSet, GenreViewSet, ReviewViewSet,
-    TitleViewSet, UserViewSet, get_token, sign_up
+    CategoryViewSet, CommentsSearchViewSet, CommentsViewSet, GenreViewSet,
+    ReviewSearchViewSet, ReviewViewSet, TitleViewSet, UserViewSet,
+    autocomplete, bulk_reviews, get_token, sign_up
 )
 
 v1_router = DefaultRouter()
@@ -22,10 +23,18 @@ v1_router.register(
     basename='comments'
 )
 v1_router.register('users', UserViewSet)
+v1_router.register(
+    r'search/reviews', ReviewSearchViewSet, basename='search-reviews'
+)
+v1_router.register(
+    r'search/comments', CommentsSearchViewSet, basename='search-comments'
+)
 
 
 urlpatterns = [
     path('v1/', include(v1_router.urls)),
     path('v1/auth/signup/', sign_up, name='register'),
     path('v1/auth/token/', get_token, name='token'),
+    path('v1/autocomplete/', autocomplete, name='autocomplete'),
+    path('v1/reviews/bulk/', bulk_reviews, name='reviews-bulk'),
 ]
@@ -1,17 +1,32 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import (action, api_view,
+                                       permission_classes)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from api_yamdb.settings import EMAIL_HOST_USER
-from reviews.models import Category, Genre, Review, Title, User
-from .filters import TitleFilter
-from .permissions import Admin, IsAdminOrReadOnly, ReviewCommentPermission
-from .serializers import CategorySerilizer, CommentsSerializer
+from reviews import catalog
+from reviews.autocomplete import complete
+from reviews.models import Category, Comments, Genre, Review, Title, User
+from reviews.versions import comments_key, reviews_key
+from .authentication import RoleRefreshToken
+from .caching import TitleDetailCache, TitleListCache
+from .export import gzip_stream, review_lines
+from .filters import CommentsSearchFilter, ReviewSearchFilter, TitleFilter
+from .mixins import (CachedListMixin, CachedRetrieveMixin,
+                     ConditionalGetMixin, ValuesListMixin)
+from .outbox import enqueue
+from .pagination import (PubDateCursorPagination, PubDatePagination,
+                         TitlePagination)
+from .permissions import (Admin, IsAdminOrReadOnly, Moderator,
+                          ReviewCommentPermission)
+from .readers import CommentsReader, ReviewReader, TitleReader
+from .serializers import (AutocompleteSerializer, BulkReviewSerializer,
+                          CategorySerilizer, CommentsSerializer)
 from .serializers import (GenreSerializer, PostTitleSerializer,
                           ReviewSerializer, TitleSerializer,
                           TokenConfirmationSerializer,
@@ -19,7 +34,7 @@ from .serializers import (GenreSerializer, PostTitleSerializer,
 
 
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = RoleRefreshToken.for_user(user)
     return {'access': str(refresh.access_token)}
 
 
@@ -27,11 +42,11 @@ def get_tokens_for_user(user):
 def sign_up(request):
     def send_email(user):
         token = default_token_generator.make_token(user)
-        send_mail(
+        enqueue(
             'Код подтверждения',
             f'Код подтверждения: {token}',
             EMAIL_HOST_USER,
-            [user.email])
+            user.email)
 
     serializer = UserRegistrationSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -61,7 +76,30 @@ def get_token(request):
         status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+def autocomplete(request):
+    """Подсказки по префиксу названий произведений, жанров и категорий."""
+    serializer = AutocompleteSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    return Response(complete(data['q'], data.get('type'), data['limit']))
+
+
+@api_view(['POST'])
+@permission_classes([Admin])
+def bulk_reviews(request):
+    """Пакетная загрузка отзывов к разным произведениям, только для админа."""
+    serializer = BulkReviewSerializer(
+        data=request.data, many=True, allow_empty=False
+    )
+    serializer.is_valid(raise_exception=True)
+    reviews = serializer.save()
+    return Response(
+        {'created': len(reviews)}, status=status.HTTP_201_CREATED
+    )
+
+
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     lookup_field = 'username'
     serializer_class = UserSerializer
@@ -69,6 +107,7 @@ class UserViewSet(viewsets.ModelViewSet):
     ordering = ['username']
     permission_classes = [Admin]
     http_method_names = ['get', 'post', 'patch', 'delete']
+    version_keys = ('users',)
 
     @action(
         detail=False,
@@ -80,6 +119,8 @@ class UserViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
+        # request.user может быть копией из кэша аутентификации.
+        user = User.objects.get(pk=user.pk)
         serializer = self.get_serializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
 
@@ -94,30 +135,64 @@ class ListCreateDestroyViewSet(mixins.ListModelMixin,
     pass
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
-    queryset = Category.objects.all()
-    serializer_class = CategorySerilizer
+class CatalogViewSet(ListCreateDestroyViewSet):
+    """Справочник: список без поиска отдаётся из кэша процесса."""
+
+    catalog_cache = None
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     permission_classes = (IsAdminOrReadOnly,)
 
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(filters.SearchFilter.search_param):
+            return super().list(request, *args, **kwargs)
+        page = self.paginate_queryset(self.catalog_cache.snapshot().objects)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class CategoryViewSet(CatalogViewSet):
+    queryset = Category.objects.all()
+    serializer_class = CategorySerilizer
+    catalog_cache = catalog.categories
 
-class GenreViewSet(ListCreateDestroyViewSet):
+
+class GenreViewSet(CatalogViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
-    lookup_field = 'slug'
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('name',)
-    permission_classes = (IsAdminOrReadOnly,)
+    catalog_cache = catalog.genres
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
+class TitleViewSet(ConditionalGetMixin, CachedListMixin, CachedRetrieveMixin,
+                   ValuesListMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    )
     serializer_class = TitleSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = TitlePagination
+    list_cache = TitleListCache()
+    list_reader = TitleReader()
+    detail_cache = TitleDetailCache()
+
+    def get_version_keys(self):
+        if self.action == 'retrieve':
+            return self.detail_cache.version_keys(self.kwargs['pk'])
+        return ['titles', 'ratings', 'genres', 'categories']
+
+    def create(self, request, *args, **kwargs):
+        """Одно произведение или список из нескольких."""
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(
+            data=request.data, many=True, allow_empty=False
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def get_serializer_class(self):
         if self.action == 'create' or self.action == 'partial_update':
@@ -126,29 +201,115 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, ValuesListMixin,
+                    viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    list_reader = ReviewReader()
     permission_classes = (ReviewCommentPermission,)
+    pagination_class = PubDatePagination
+    title = None
+
+    def get_version_keys(self):
+        return [reviews_key(self.kwargs.get('title_id')), 'users']
 
     def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+        """Произведение из адреса, один запрос на весь запрос к API."""
+        if self.title is None:
+            self.title = get_object_or_404(
+                Title, id=self.kwargs.get('title_id')
+            )
+        return self.title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        """Отзывы произведения из адреса.
+
+        Отдельный отзыв ищется сразу по паре (произведение, id), поэтому
+        произведение проверяется заранее только для списка.
+        """
+        if not self.detail:
+            return self.get_title().reviews.select_related('author')
+        return Review.objects.filter(
+            title_id=self.kwargs.get('title_id')
+        ).select_related('author')
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """Все отзывы произведения с комментариями потоком NDJSON."""
+        lines = review_lines(self.get_title().id)
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            response = StreamingHttpResponse(
+                gzip_stream(lines), content_type='application/x-ndjson'
+            )
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = StreamingHttpResponse(
+                lines, content_type='application/x-ndjson'
+            )
+        response['Vary'] = 'Accept-Encoding'
+        return response
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        with transaction.atomic():
+            serializer.save(author=self.request.user, title=self.get_title())
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
 
-class CommentsViewSet(viewsets.ModelViewSet):
+
+class CommentsViewSet(ConditionalGetMixin, ValuesListMixin,
+                      viewsets.ModelViewSet):
     serializer_class = CommentsSerializer
+    list_reader = CommentsReader()
     permission_classes = (ReviewCommentPermission,)
+    pagination_class = PubDatePagination
+    review = None
+
+    def get_version_keys(self):
+        return [comments_key(self.kwargs.get('review_id')), 'users']
 
     def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+        """Отзыв из адреса вместе с проверкой произведения, один запрос."""
+        if self.review is None:
+            self.review = get_object_or_404(
+                Review,
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+        return self.review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        """Комментарии отзыва из адреса.
+
+        Для отдельного комментария отзыв и произведение проверяются
+        в том же запросе, что и сам комментарий.
+        """
+        if not self.detail:
+            return self.get_review().comments.select_related('author')
+        return Comments.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
+
+
+class ReviewSearchViewSet(ValuesListMixin, viewsets.GenericViewSet):
+    queryset = Review.objects.all()
+    serializer_class = ReviewSerializer
+    list_reader = ReviewReader()
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = ReviewSearchFilter
+    permission_classes = (Moderator,)
+    pagination_class = PubDateCursorPagination
+
+
+class CommentsSearchViewSet(ValuesListMixin, viewsets.GenericViewSet):
+    queryset = Comments.objects.all()
+    serializer_class = CommentsSerializer
+    list_reader = CommentsReader()
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = CommentsSearchFilter
+    permission_classes = (Moderator,)
+    pagination_class = PubDateCursorPagination
@@ -0,0 +1,131 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class SharedMemoryCache(BaseCache):
+    """Кэш в файле, отображённом в память и общем для процессов на хосте.
+
+    Файл (по умолчанию в /dev/shm, то есть в оперативной памяти) разбит на
+    `SLOTS` ячеек по `SLOT_SIZE` байт. Ключ попадает в ячейку по своему хэшу,
+    при коллизии новое значение вытесняет старое. Ячейка на время чтения
+    и записи блокируется через fcntl.lockf на её диапазон байтов, внутри
+    процесса — ещё и потоковой блокировкой. Значения крупнее ячейки
+    не кэшируются.
+    """
+
+    header = struct.Struct('<16sdI')
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location or '/dev/shm/yamdb-cache'
+        self.slots = int(options.get('SLOTS', 1024))
+        self.slot_size = int(options.get('SLOT_SIZE', 64 * 1024))
+        self.thread_lock = threading.Lock()
+        self.pid = None
+        self.fd = None
+        self.memory = None
+
+    def _open(self):
+        if self.pid != os.getpid():
+            size = self.slots * self.slot_size
+            fd = os.open(self.location, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.fd = fd
+            self.memory = mmap.mmap(fd, size)
+            self.pid = os.getpid()
+        return self.memory
+
+    def _locate(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        slot = int.from_bytes(digest[:8], 'little') % self.slots
+        return digest, slot * self.slot_size
+
+    @contextmanager
+    def _locked(self, offset, length=None):
+        length = length or self.slot_size
+        with self.thread_lock:
+            memory = self._open()
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, length, offset)
+            try:
+                yield memory
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, length, offset)
+
+    def _read(self, memory, digest, offset):
+        stored, expires, length = self.header.unpack_from(memory, offset)
+        if stored != digest or (expires and expires <= time.time()):
+            return None
+        start = offset + self.header.size
+        return memory[start:start + length]
+
+    def _write(self, memory, digest, offset, value, timeout):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if self.header.size + len(payload) > self.slot_size:
+            self.header.pack_into(memory, offset, bytes(16), 0, 0)
+            return False
+        expires = self.get_backend_timeout(timeout)
+        start = offset + self.header.size
+        memory[start:start + len(payload)] = payload
+        self.header.pack_into(
+            memory, offset, digest, expires or 0, len(payload)
+        )
+        return True
+
+    def get(self, key, default=None, version=None):
+        digest, offset = self._locate(key, version)
+        with self._locked(offset) as memory:
+            payload = self._read(memory, digest, offset)
+        if payload is None:
+            return default
+        return pickle.loads(payload)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        digest, offset = self._locate(key, version)
+        with self._locked(offset) as memory:
+            self._write(memory, digest, offset, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        digest, offset = self._locate(key, version)
+        with self._locked(offset) as memory:
+            if self._read(memory, digest, offset) is not None:
+                return False
+            return self._write(memory, digest, offset, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        digest, offset = self._locate(key, version)
+        with self._locked(offset) as memory:
+            payload = self._read(memory, digest, offset)
+            if payload is None:
+                return False
+            expires = self.get_backend_timeout(timeout)
+            self.header.pack_into(
+                memory, offset, digest, expires or 0, len(payload)
+            )
+            return True
+
+    def delete(self, key, version=None):
+        digest, offset = self._locate(key, version)
+        with self._locked(offset) as memory:
+            if self._read(memory, digest, offset) is None:
+                return False
+            self.header.pack_into(memory, offset, bytes(16), 0, 0)
+            return True
+
+    def clear(self):
+        size = self.slots * self.slot_size
+        with self._locked(0, size) as memory:
+            for offset in range(0, size, self.slot_size):
+                self.header.pack_into(memory, offset, bytes(16), 0, 0)
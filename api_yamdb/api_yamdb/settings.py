@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -23,8 +24,8 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django_filters',
-    'reviews',
-    'api',
+    'reviews.apps.ReviewsConfig',
+    'api.apps.ApiConfig',
     'drf_yasg',
 ]
 
@@ -68,6 +69,52 @@ DATABASES = {
     }
 }
 
+# Cache
+
+# Кэш страниц списка произведений: locmem — в памяти процесса,
+# file — в файлах на диске, shm — в общей памяти для всех процессов хоста.
+TITLES_CACHE_BACKEND = os.getenv('TITLES_CACHE_BACKEND', 'locmem')
+TITLES_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'titles',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yamdb-titles'),
+    },
+    'shm': {
+        'BACKEND': 'api_yamdb.cache_backends.SharedMemoryCache',
+        'LOCATION': '/dev/shm/yamdb-titles',
+        'OPTIONS': {'SLOTS': 4096, 'SLOT_SIZE': 64 * 1024},
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'titles': {
+        **TITLES_CACHE_BACKENDS[TITLES_CACHE_BACKEND],
+        'TIMEOUT': 60 * 60,
+    },
+}
+
+# Карточка произведения: запись, у которой изменился только рейтинг, отдаётся
+# анонимным запросам, пока с момента изменения прошло не больше
+# TITLE_DETAIL_GRACE_PERIOD секунд, и обновляется в фоне.
+# Остальные запросы ждут пересчёта, начатого другим процессом, не дольше
+# TITLE_DETAIL_WAIT секунд.
+TITLE_DETAIL_GRACE_PERIOD = 30
+TITLE_DETAIL_LOCK_TIMEOUT = 10
+TITLE_DETAIL_WAIT = 3
+
+# Сколько произведений можно создать одним POST запросом со списком.
+TITLES_BULK_CREATE_LIMIT = 500
+
+# Сколько отзывов можно загрузить одним запросом пакетной загрузки.
+REVIEWS_BULK_CREATE_LIMIT = 5000
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -116,14 +163,36 @@ EMAIL_PORT = 587
 EMAIL_HOST_USER = "yamdbSIA@gmail.com"
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
+# Очередь писем (команда send_emails): письма уходят пачками по
+# EMAIL_OUTBOX_BATCH_SIZE через одно соединение. После неудачи пауза
+# начинается с EMAIL_OUTBOX_RETRY_DELAY секунд и удваивается, но не больше
+# EMAIL_OUTBOX_MAX_RETRY_DELAY, всего не больше EMAIL_OUTBOX_MAX_ATTEMPTS
+# попыток. Взятая пачка недоступна другим процессам EMAIL_OUTBOX_LEASE
+# секунд.
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_RETRY_DELAY = 60 * 60
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+EMAIL_OUTBOX_LEASE = 5 * 60
+
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ],
 }
 
+# Пользователь из токена хранится в памяти процесса не дольше
+# USER_CACHE_TTL секунд, записей — не больше USER_CACHE_SIZE.
+USER_CACHE_TTL = 30
+USER_CACHE_SIZE = 10000
+# Не больше TOKEN_CACHE_SIZE проверенных токенов в памяти процесса,
+# каждый хранится до своего exp.
+TOKEN_CACHE_SIZE = 10000
+# Как часто процесс подтягивает из базы отзывы ролей в токенах, секунды.
+TOKEN_REVOCATION_SYNC_INTERVAL = 1
+
 SIMPLE_JWT = {
     """Устанавливаем срок жизни токена."""
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
@@ -0,0 +1,136 @@
+import bisect
+import heapq
+import threading
+from itertools import islice
+
+from .models import Category, Genre, Title
+from .search import WORD_RE, normalize
+from .versions import get_versions
+
+
+def suffixes(name):
+    """Название и его хвосты, начинающиеся с каждого следующего слова."""
+    name = normalize(name)
+    result = {name}
+    for match in WORD_RE.finditer(name):
+        result.add(name[match.start():])
+    return result
+
+
+class PrefixIndex:
+    """Отсортированный массив названий процесса для поиска по префиксу.
+
+    Каждый процесс держит свою копию и сверяет её со счётчиком версий
+    `version_key`: изменения, сделанные в этом процессе, вносятся в индекс
+    точечно, а чужие изменения приводят к перестроению при следующем запросе.
+    """
+
+    def __init__(self, kind, model, key_field, version_key):
+        self.kind = kind
+        self.model = model
+        self.key_field = key_field
+        self.version_key = version_key
+        self.version = None
+        self.strings = []
+        self.items = []
+        self.names = {}
+        self.lock = threading.Lock()
+
+    def rebuild(self, version):
+        rows = self.model.objects.order_by().values_list(
+            'pk', 'name', self.key_field
+        )
+        names = {pk: (name, key) for pk, name, key in rows.iterator()}
+        pairs = sorted(
+            (string, pk)
+            for pk, (name, key) in names.items()
+            for string in suffixes(name)
+        )
+        with self.lock:
+            self.strings = [string for string, pk in pairs]
+            self.items = [pk for string, pk in pairs]
+            self.names = names
+            self.version = version
+
+    def refresh(self, version):
+        if self.version != version:
+            self.rebuild(version)
+
+    def _add(self, strings, items, pk, name):
+        for string in suffixes(name):
+            position = bisect.bisect_left(strings, string)
+            strings.insert(position, string)
+            items.insert(position, pk)
+
+    def _remove(self, strings, items, pk, name):
+        for string in suffixes(name):
+            position = bisect.bisect_left(strings, string)
+            while items[position] != pk:
+                position += 1
+            del strings[position]
+            del items[position]
+
+    def apply(self, version, instance, deleted=False):
+        """Точечно вносит изменение объекта, сделанное в этом процессе.
+
+        `version` — версия (номер, время) после изменения. Если между нашей
+        копией и ней были чужие изменения, копия помечается устаревшей.
+        Списки копируются при записи, чтобы читатели работали без блокировки.
+        """
+        with self.lock:
+            if self.version is None:
+                return
+            if version[0] != self.version[0] + 1:
+                self.version = None
+                return
+            strings, items = list(self.strings), list(self.items)
+            names = dict(self.names)
+            old = names.pop(instance.pk, None)
+            if old is not None:
+                self._remove(strings, items, instance.pk, old[0])
+            if not deleted:
+                self._add(strings, items, instance.pk, instance.name)
+                names[instance.pk] = (
+                    instance.name, getattr(instance, self.key_field)
+                )
+            self.strings, self.items, self.names = strings, items, names
+            self.version = version
+
+    def complete(self, prefix):
+        """Объекты, у которых название или одно из слов начинается с prefix.
+
+        Отдаёт кортежи (совпавшая строка, тип, ключ, название) по возрастанию
+        совпавшей строки, каждый объект один раз.
+        """
+        with self.lock:
+            strings, items, names = self.strings, self.items, self.names
+        seen = set()
+        position = bisect.bisect_left(strings, prefix)
+        while position < len(strings) and strings[position].startswith(prefix):
+            pk = items[position]
+            if pk not in seen and pk in names:
+                seen.add(pk)
+                name, key = names[pk]
+                yield strings[position], self.kind, key, name
+            position += 1
+
+
+INDEXES = {
+    'title': PrefixIndex('title', Title, 'id', 'title-names'),
+    'genre': PrefixIndex('genre', Genre, 'slug', 'genres'),
+    'category': PrefixIndex('category', Category, 'slug', 'categories'),
+}
+
+
+def complete(text, kinds=None, limit=10):
+    """Первые `limit` подсказок по префиксу среди названий выбранных типов."""
+    indexes = [INDEXES[kind] for kind in (kinds or INDEXES)]
+    versions = get_versions([index.version_key for index in indexes])
+    for index in indexes:
+        index.refresh(versions[index.version_key])
+    prefix = normalize(text).strip()
+    matches = heapq.merge(*(index.complete(prefix) for index in indexes))
+    return [
+        {'type': kind, INDEXES[kind].key_field: key, 'name': name}
+        for string, kind, key, name in islice(matches, limit)
+    ]
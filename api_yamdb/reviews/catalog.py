@@ -0,0 +1,34 @@
+from collections import namedtuple
+
+from .models import Category, Genre
+from .versions import get_versions
+
+Snapshot = namedtuple('Snapshot', ('objects', 'by_slug'))
+
+
+class CatalogCache:
+    """Вся таблица небольшого справочника в памяти процесса.
+
+    Перед выдачей снимка сверяет версию `version_key` одним запросом
+    и перечитывает таблицу, если её изменили в любом процессе.
+    """
+
+    def __init__(self, model, version_key):
+        self.model = model
+        self.version_key = version_key
+        self.version = None
+        self.data = Snapshot((), {})
+
+    def snapshot(self):
+        version = get_versions([self.version_key])[self.version_key]
+        if version != self.version:
+            objects = tuple(self.model.objects.all())
+            self.data = Snapshot(
+                objects, {obj.slug: obj for obj in objects}
+            )
+            self.version = version
+        return self.data
+
+
+categories = CatalogCache(Category, 'categories')
+genres = CatalogCache(Genre, 'genres')
@@ -0,0 +1,334 @@
+import csv
+import datetime as dt
+import hashlib
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+
+from .models import Category, Comments, Genre, Review, Title, User
+from .versions import comments_key, rating_key, reviews_key, title_key
+
+Column = namedtuple('Column', ('header', 'field', 'parse'))
+
+
+def as_int(value):
+    return int(value)
+
+
+def as_text(value):
+    return value
+
+
+def as_optional_text(value):
+    return value or None
+
+
+def as_datetime(value):
+    return parse_datetime(value)
+
+
+def as_password(value):
+    """Хэш пароля со своей солью, готовый хэш сохраняется как есть."""
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return make_password(value or None)
+    return value
+
+
+def to_text(value):
+    """Значение поля в виде строки CSV, даты — как в static/data."""
+    if value is None:
+        return ''
+    if isinstance(value, dt.datetime):
+        return to_json(value)
+    return str(value)
+
+
+def to_json(value):
+    if isinstance(value, dt.datetime):
+        timespec = 'microseconds' if value.microsecond % 1000 else (
+            'milliseconds'
+        )
+        return value.astimezone(dt.timezone.utc).isoformat(
+            timespec=timespec
+        ).replace('+00:00', 'Z')
+    return value
+
+
+def row_hash(values):
+    """Хэш содержимого строки для сравнения файла с базой.
+
+    Даты приводятся к UTC, чтобы смещение в файле не считалось изменением.
+    """
+    values = tuple(
+        value.astimezone(dt.timezone.utc)
+        if isinstance(value, dt.datetime) else value
+        for value in values
+    )
+    return hashlib.blake2b(repr(values).encode(), digest_size=16).digest()
+
+
+Batch = namedtuple('Batch', ('rows', 'errors', 'keys', 'rated'))
+
+
+class Loader:
+    """Описание одного CSV-файла: модель и разбор каждой колонки.
+
+    `parse_batch` превращает строки файла в значения полей модели
+    и проверяет их валидаторами полей. `global_keys` — счётчики версий,
+    которые сдвигает загрузка файла, `keys` — пары (функция ключа, поле)
+    для счётчиков отдельных объектов, `rated` — поле произведения, рейтинг
+    которого нужно пересчитать. При повторной загрузке строка ищется
+    по полям `lookup`, а поля `insert_only` задаются только новым объектам.
+    """
+
+    def __init__(self, name, filename, model, columns, global_keys=(),
+                 keys=(), lookup=('id',), insert_only=(), rated=None):
+        self.name = name
+        self.filename = filename
+        self.model = model
+        self.columns = columns
+        self.global_keys = global_keys
+        self.keys = keys
+        self.lookup = lookup
+        self.insert_only = insert_only
+        self.rated = rated
+        self.compared = tuple(
+            column.field for column in columns
+            if column.field not in lookup and column.field not in insert_only
+            and column.field != 'id'
+        )
+        self.fields = tuple(
+            model._meta.get_field(column.field) for column in columns
+        )
+        self.insert_fields = tuple(model._meta.local_concrete_fields)
+
+    def path(self, directory):
+        return os.path.join(directory, self.filename)
+
+    def read(self, directory, batch_size):
+        """Пакеты сырых строк: (заголовок, строки, номер первой записи)."""
+        with open(self.path(directory), encoding='utf-8', newline='') as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            start = 1
+            while True:
+                rows = list(islice(reader, batch_size))
+                if not rows:
+                    return
+                yield header, rows, start
+                start += len(rows)
+
+    def validate(self, values):
+        for field in self.fields:
+            value = values[field.attname]
+            if field.is_relation:
+                if value is None and not field.null:
+                    raise ValidationError(f'{field.name}: пустое значение')
+                continue
+            try:
+                field.validate(value, None)
+                field.run_validators(value)
+            except ValidationError as error:
+                raise ValidationError(f'{field.name}: {"; ".join(error)}')
+
+    def prepare(self, values):
+        """Значения строки для INSERT в порядке `insert_fields`."""
+        return tuple(
+            field.get_db_prep_save(
+                values[field.attname] if field.attname in values
+                else field.get_default(),
+                connection
+            )
+            for field in self.insert_fields
+        )
+
+    def parse_batch(self, header, rows, start, prepared=False):
+        """Разбирает пакет строк файла.
+
+        Возвращает Batch: словари значений полей (или готовые для INSERT
+        кортежи при `prepared`), описания ошибок в отброшенных строках,
+        затронутые ключи версий и произведения для пересчёта рейтинга.
+        """
+        positions = [header.index(column.header) for column in self.columns]
+        batch = Batch([], [], set(), set())
+        for number, row in enumerate(rows, start):
+            try:
+                values = {
+                    column.field: column.parse(row[position])
+                    for column, position in zip(self.columns, positions)
+                }
+                self.validate(values)
+            except (IndexError, ValueError, ValidationError) as error:
+                message = '; '.join(getattr(error, 'messages', [str(error)]))
+                batch.errors.append(
+                    f'{self.filename}, запись {number}: {message}'
+                )
+                continue
+            self.touch(values, batch.keys, batch.rated)
+            batch.rows.append(self.prepare(values) if prepared else values)
+        return batch
+
+    def touch(self, values, keys, rated):
+        """Добавляет ключи версий и произведение, затронутые строкой."""
+        keys.update(make_key(values[field]) for make_key, field in self.keys)
+        if self.rated:
+            rated.add(values[self.rated])
+
+    def insert(self, rows):
+        """Вставляет подготовленные `prepare` строки многострочными INSERT.
+
+        Размер одного INSERT ограничен числом параметров запроса базы.
+        """
+        if not rows:
+            return
+        quote = connection.ops.quote_name
+        columns = ', '.join(
+            quote(field.column) for field in self.insert_fields
+        )
+        row_sql = '(' + ', '.join(['%s'] * len(self.insert_fields)) + ')'
+        size = max(
+            connection.ops.bulk_batch_size(self.insert_fields, rows), 1
+        )
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), size):
+                chunk = rows[start:start + size]
+                cursor.execute(
+                    f'INSERT INTO {quote(self.model._meta.db_table)} '
+                    f'({columns}) VALUES ' + ', '.join([row_sql] * len(chunk)),
+                    [value for row in chunk for value in row]
+                )
+
+    def chunks(self, chunk_size):
+        """Строки таблицы в колонках файла, пакетами по возрастанию pk.
+
+        Каждый пакет — отдельный запрос `pk > последний`, поэтому в памяти
+        не больше `chunk_size` строк и нет OFFSET.
+        """
+        fields = [column.field for column in self.columns]
+        last = None
+        while True:
+            queryset = self.model.objects.order_by('pk')
+            if last is not None:
+                queryset = queryset.filter(pk__gt=last)
+            rows = list(queryset.values_list('pk', *fields)[:chunk_size])
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+    def lookup_key(self, values):
+        return tuple(values[field] for field in self.lookup)
+
+    def content_hash(self, values):
+        return row_hash(tuple(values[field] for field in self.compared))
+
+    def existing(self, batch):
+        """{ключ строки: строка в базе} для строк пакета, которые уже есть."""
+        first = self.lookup[0]
+        rows = self.model.objects.filter(**{
+            f'{first}__in': {values[first] for values in batch}
+        }).values('pk', *self.lookup, *self.compared)
+        return {self.lookup_key(row): row for row in rows.iterator()}
+
+
+LOADERS = (
+    Loader('users', 'users.csv', User, (
+        Column('id', 'id', as_int),
+        Column('username', 'username', as_text),
+        Column('email', 'email', as_text),
+        Column('role', 'role', as_text),
+        Column('bio', 'bio', as_text),
+        Column('first_name', 'first_name', as_text),
+        Column('last_name', 'last_name', as_text),
+        Column('password', 'password', as_password),
+    ), global_keys=('users',), insert_only=('password',)),
+    Loader('category', 'category.csv', Category, (
+        Column('id', 'id', as_int),
+        Column('name', 'name', as_text),
+        Column('slug', 'slug', as_text),
+    ), global_keys=('categories', 'titles')),
+    Loader('genre', 'genre.csv', Genre, (
+        Column('id', 'id', as_int),
+        Column('name', 'name', as_text),
+        Column('slug', 'slug', as_text),
+    ), global_keys=('genres', 'titles')),
+    Loader('titles', 'titles.csv', Title, (
+        Column('id', 'id', as_int),
+        Column('name', 'name', as_text),
+        Column('year', 'year', as_int),
+        Column('description', 'description', as_optional_text),
+        Column('category', 'category_id', as_int),
+    ), global_keys=('titles', 'title-names'), keys=((title_key, 'id'),)),
+    Loader('genre_title', 'genre_title.csv', Title.genre.through, (
+        Column('id', 'id', as_int),
+        Column('title_id', 'title_id', as_int),
+        Column('genre_id', 'genre_id', as_int),
+    ), global_keys=('titles',), keys=((title_key, 'title_id'),),
+        lookup=('title_id', 'genre_id')),
+    Loader('review', 'review.csv', Review, (
+        Column('id', 'id', as_int),
+        Column('title_id', 'title_id', as_int),
+        Column('text', 'text', as_text),
+        Column('author', 'author_id', as_int),
+        Column('score', 'score', as_int),
+        Column('pub_date', 'pub_date', as_datetime),
+    ), global_keys=('ratings',),
+        keys=((reviews_key, 'title_id'), (rating_key, 'title_id')),
+        rated='title_id'),
+    Loader('comments', 'comments.csv', Comments, (
+        Column('id', 'id', as_int),
+        Column('review_id', 'review_id', as_int),
+        Column('text', 'text', as_text),
+        Column('author', 'author_id', as_int),
+        Column('pub_date', 'pub_date', as_datetime),
+    ), keys=((comments_key, 'review_id'),)),
+)
+
+
+LOADERS_BY_NAME = {loader.name: loader for loader in LOADERS}
+
+
+def parse_batch(name, header, rows, start, prepared):
+    """Разбор пакета по имени файла: точка входа для процессов пула."""
+    return LOADERS_BY_NAME[name].parse_batch(header, rows, start, prepared)
+
+
+def parsed_batches(loaders, directory, batch_size, workers=0,
+                   prepared=False):
+    """Разобранные пакеты файлов по порядку: пары (загрузчик, Batch).
+
+    При `workers` > 1 пакеты разбираются и готовятся к вставке в пуле
+    процессов, а результаты отдаются в исходном порядке, так что
+    единственный писатель сохраняет порядок внешних ключей. Вперёд
+    разбирается не больше `2 * workers` пакетов.
+    """
+    tasks = (
+        (loader, header, rows, start)
+        for loader in loaders
+        for header, rows, start in loader.read(directory, batch_size)
+    )
+    if workers <= 1:
+        for loader, header, rows, start in tasks:
+            yield loader, loader.parse_batch(header, rows, start, prepared)
+        return
+    with ProcessPoolExecutor(workers, initializer=django.setup) as executor:
+        pending = deque()
+        for loader, header, rows, start in tasks:
+            pending.append((loader, executor.submit(
+                parse_batch, loader.name, header, rows, start, prepared
+            )))
+            if len(pending) >= 2 * workers:
+                loader, future = pending.popleft()
+                yield loader, future.result()
+        while pending:
+            loader, future = pending.popleft()
+            yield loader, future.result()
@@ -0,0 +1,106 @@
+import csv
+import os
+import tempfile
+import time
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.loaders import LOADERS, parsed_batches
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает import_csv в одном процессе и с пулом процессов '
+        'на синтетических CSV. Загрузка идёт во временной транзакции.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            self.generate(directory, options['reviews'])
+            for workers in (0, options['workers']):
+                self.run(directory, workers, options['batch_size'])
+
+    def run(self, directory, workers, batch_size):
+        started = time.perf_counter()
+        rows = sum(
+            len(batch.rows) for _, batch in parsed_batches(
+                LOADERS, directory, batch_size, workers, prepared=True
+            )
+        )
+        parsed = time.perf_counter() - started
+        with transaction.atomic():
+            started = time.perf_counter()
+            call_command(
+                'import_csv', path=directory, workers=workers,
+                batch_size=batch_size, stdout=StringIO()
+            )
+            loaded = time.perf_counter() - started
+            transaction.set_rollback(True)
+        mode = f'пул из {workers} процессов' if workers > 1 else 'один процесс'
+        self.stdout.write(
+            f'{mode}: разбор {rows / parsed:.0f} строк/с, '
+            f'загрузка {rows / loaded:.0f} строк/с ({loaded:.2f} с)'
+        )
+
+    def generate(self, directory, reviews):
+        """Синтетические файлы с id после уже занятых в базе."""
+        offsets = {
+            loader.name: loader.model.objects.aggregate(
+                top=Max('id')
+            )['top'] or 0
+            for loader in LOADERS
+        }
+        users = 1000
+        titles = max(reviews // users, 1)
+        date = '2020-01-13T23:20:02.422Z'
+
+        def write(name, rows):
+            loader = next(item for item in LOADERS if item.name == name)
+            with open(loader.path(directory), 'w', encoding='utf-8',
+                      newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow([column.header for column in loader.columns])
+                writer.writerows(rows)
+
+        user, category, genre, title, link, review, comment = (
+            offsets[name] for name in (
+                'users', 'category', 'genre', 'titles', 'genre_title',
+                'review', 'comments'
+            )
+        )
+        write('users', (
+            (user + index, f'bench{user + index}',
+             f'bench{user + index}@yamdb.fake', 'user', '', '', '',
+             'P@ssw0rd')
+            for index in range(1, users + 1)
+        ))
+        write('category', [(category + 1, 'Бенчмарк', f'bench{category}')])
+        write('genre', [(genre + 1, 'Бенчмарк', f'bench{genre}')])
+        write('titles', (
+            (title + index, f'Произведение {index}', 2000, '',
+             category + 1)
+            for index in range(1, titles + 1)
+        ))
+        write('genre_title', (
+            (link + index, title + index, genre + 1)
+            for index in range(1, titles + 1)
+        ))
+        write('review', (
+            (review + index + 1, title + index // users + 1,
+             'Текст отзыва', user + index % users + 1, 7, date)
+            for index in range(reviews)
+        ))
+        write('comments', (
+            (comment + index, review + index * 10, 'Комментарий',
+             user + 1, date)
+            for index in range(1, reviews // 10 + 1)
+        ))
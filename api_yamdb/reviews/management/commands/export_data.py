@@ -0,0 +1,116 @@
+import csv
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reviews.loaders import LOADERS, to_json, to_text
+
+
+def open_output(path, compress):
+    if compress:
+        return gzip.open(path + '.gz', 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def export_csv(loader, file, chunk_size):
+    writer = csv.writer(file)
+    writer.writerow([column.header for column in loader.columns])
+    count = 0
+    for rows in loader.chunks(chunk_size):
+        writer.writerows([to_text(value) for value in row] for row in rows)
+        count += len(rows)
+    return count
+
+
+def export_ndjson(loader, file, chunk_size):
+    headers = [column.header for column in loader.columns]
+    count = 0
+    for rows in loader.chunks(chunk_size):
+        file.writelines(
+            json.dumps(
+                dict(zip(headers, map(to_json, row))),
+                ensure_ascii=False, separators=(',', ':')
+            ) + '\n'
+            for row in rows
+        )
+        count += len(rows)
+    return count
+
+
+EXPORTERS = {'csv': export_csv, 'ndjson': export_ndjson}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает таблицы в колонках static/data в CSV или NDJSON '
+        'пакетами по возрастанию pk, в памяти не больше одного пакета '
+        'на таблицу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*', metavar='name',
+            help='Какие таблицы выгрузить, по умолчанию все: ' + ', '.join(
+                loader.name for loader in LOADERS
+            )
+        )
+        parser.add_argument('--output', default='export',
+                            help='Каталог для файлов.')
+        parser.add_argument('--format', choices=list(EXPORTERS),
+                            default='csv')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Сжимать файлы в gzip.')
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument(
+            '--jobs', type=int, default=1,
+            help='Сколько таблиц выгружать одновременно.'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - {loader.name for loader in LOADERS}
+        if unknown:
+            raise CommandError(
+                f'Неизвестные таблицы: {", ".join(sorted(unknown))}'
+            )
+        loaders = [
+            loader for loader in LOADERS
+            if not options['names'] or loader.name in options['names']
+        ]
+        os.makedirs(options['output'], exist_ok=True)
+        if options['jobs'] <= 1:
+            results = [self.export(loader, options) for loader in loaders]
+        else:
+            with ThreadPoolExecutor(options['jobs']) as executor:
+                results = list(executor.map(
+                    lambda loader: self.export(loader, options, close=True),
+                    loaders
+                ))
+        for path, count, elapsed in results:
+            self.stdout.write(self.style.SUCCESS(
+                f'{path}: {count} строк за {elapsed:.2f} с '
+                f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+            ))
+
+    def export(self, loader, options, close=False):
+        """Выгружает одну таблицу, в потоке пула закрывает своё соединение."""
+        name, extension = os.path.splitext(loader.filename)
+        if options['format'] != 'csv':
+            extension = '.' + options['format']
+        path = os.path.join(options['output'], name + extension)
+        started = time.perf_counter()
+        try:
+            with open_output(path, options['gzip']) as file:
+                count = EXPORTERS[options['format']](
+                    loader, file, options['chunk_size']
+                )
+        finally:
+            if close:
+                connection.close()
+        if options['gzip']:
+            path += '.gz'
+        return path, count, time.perf_counter() - started
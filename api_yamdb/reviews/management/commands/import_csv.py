@@ -0,0 +1,204 @@
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from reviews.loaders import LOADERS, parsed_batches
+from reviews.models import Title, TokenRevocation, User
+from reviews.versions import bump_many
+
+SQLITE_PRAGMAS = {
+    'synchronous': 'OFF',
+    'journal_mode': 'MEMORY',
+    'temp_store': 'MEMORY',
+    'cache_size': '-262144',
+}
+
+
+@contextmanager
+def bulk_load_pragmas():
+    """Настройки SQLite для массовой загрузки, после неё — прежние.
+
+    Внутри транзакции SQLite не даёт их менять, тогда они не трогаются.
+    """
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        previous = {}
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name}')
+            previous[name] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {name} = {value}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for name, value in previous.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает CSV-файлы static/data в базу пакетами в порядке '
+        'внешних ключей, каждый файл — в своей транзакции. С --upsert '
+        'существующие строки обновляются, только если их содержимое '
+        'изменилось. С --workers строки разбираются в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*', metavar='name',
+            help='Какие файлы загрузить, по умолчанию все: ' + ', '.join(
+                loader.name for loader in LOADERS
+            )
+        )
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Обновлять строки с теми же ключами вместо вставки.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Процессов для разбора и проверки строк, '
+                 'по умолчанию разбор идёт в этом процессе.'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - {loader.name for loader in LOADERS}
+        if unknown:
+            raise CommandError(
+                f'Неизвестные файлы: {", ".join(sorted(unknown))}'
+            )
+        loaders = [
+            loader for loader in LOADERS
+            if not options['names'] or loader.name in options['names']
+        ]
+        for loader in loaders:
+            if not os.path.exists(loader.path(options['path'])):
+                raise CommandError(
+                    f'Нет файла {loader.path(options["path"])}'
+                )
+        global_keys = set()
+        self.keys = set()
+        self.rated_titles = set()
+        self.role_changed = set()
+        batches = parsed_batches(
+            loaders, options['path'], options['batch_size'],
+            options['workers'], prepared=not options['upsert']
+        )
+        with bulk_load_pragmas():
+            try:
+                for loader, group in groupby(batches, key=itemgetter(0)):
+                    started = time.perf_counter()
+                    stats = self.load(loader, group, options['upsert'])
+                    if stats['inserted'] or stats['updated']:
+                        global_keys.update(loader.global_keys)
+                    self.report(loader, stats, time.perf_counter() - started)
+            finally:
+                with transaction.atomic():
+                    self.reset_sequences(loaders)
+                    self.recalculate_ratings()
+                    self.revoke_roles()
+                    bump_many(sorted(global_keys) + sorted(self.keys))
+
+    def load(self, loader, batches, upsert):
+        stats = Counter()
+        with transaction.atomic():
+            for _, batch in batches:
+                if batch.errors:
+                    raise CommandError(
+                        'Ошибки в строках, файл не загружен:\n'
+                        + '\n'.join(batch.errors[:20])
+                    )
+                if upsert:
+                    self.upsert(loader, batch.rows, stats)
+                    continue
+                loader.insert(batch.rows)
+                self.keys.update(batch.keys)
+                self.rated_titles.update(batch.rated)
+                stats['inserted'] += len(batch.rows)
+        return stats
+
+    def written(self, loader, values):
+        loader.touch(values, self.keys, self.rated_titles)
+
+    def upsert(self, loader, batch, stats):
+        existing = loader.existing(batch)
+        new = []
+        changed = []
+        for values in batch:
+            row = existing.get(loader.lookup_key(values))
+            if row is None:
+                new.append(values)
+            elif loader.content_hash(values) == loader.content_hash(row):
+                stats['skipped'] += 1
+            else:
+                if loader.model is User and row['role'] != values['role']:
+                    self.role_changed.add(row['pk'])
+                self.written(loader, row)
+                changed.append(loader.model(pk=row['pk'], **{
+                    field: values[field] for field in loader.compared
+                }))
+                self.written(loader, values)
+        for values in new:
+            self.written(loader, values)
+        loader.insert([loader.prepare(values) for values in new])
+        stats['inserted'] += len(new)
+        if changed:
+            loader.model.objects.bulk_update(changed, loader.compared)
+            stats['updated'] += len(changed)
+
+    def recalculate_ratings(self, batch_size=500):
+        title_ids = sorted(self.rated_titles)
+        for start in range(0, len(title_ids), batch_size):
+            Title.objects.filter(
+                id__in=title_ids[start:start + batch_size]
+            ).recalculate_ratings()
+
+    def revoke_roles(self):
+        """Отзывает роль в токенах пользователей, чья роль изменилась.
+
+        bulk_update не вызывает сигналы, поэтому записи отзыва пишутся
+        здесь, после сохранения новых ролей.
+        """
+        if not self.role_changed:
+            return
+        now = timezone.now()
+        TokenRevocation.objects.filter(
+            user_id__in=self.role_changed
+        ).delete()
+        TokenRevocation.objects.bulk_create(
+            TokenRevocation(user_id=user_id, revoked_at=now)
+            for user_id in self.role_changed
+        )
+
+    def reset_sequences(self, loaders):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [loader.model for loader in loaders]
+        )
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def report(self, loader, stats, elapsed):
+        count = sum(stats.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{loader.filename}: добавлено {stats["inserted"]}, '
+            f'изменено {stats["updated"]}, без изменений {stats["skipped"]} '
+            f'за {elapsed:.2f} с '
+            f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+        ))
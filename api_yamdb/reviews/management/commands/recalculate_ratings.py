@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import Title
+from reviews.versions import bump_many, rating_key
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги всех произведений по таблице отзывов.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.recalculate_ratings()
+            bump_many(['ratings', *(
+                rating_key(pk)
+                for pk in Title.objects.values_list('pk', flat=True)
+            )])
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитан рейтинг произведений: {updated}')
+        )
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+FORWARD_SQL = (
+    """
+    CREATE VIRTUAL TABLE reviews_title_fts USING fts5(
+        name, description,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    INSERT INTO reviews_title_fts (rowid, name, description)
+    SELECT id,
+        replace(replace(name, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(coalesce(description, ''), 'ё', 'е'), 'Ё', 'Е')
+    FROM reviews_title
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts (rowid, name, description) VALUES (
+            new.id,
+            replace(replace(new.name, 'ё', 'е'), 'Ё', 'Е'),
+            replace(replace(coalesce(new.description, ''), 'ё', 'е'), 'Ё', 'Е')
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        UPDATE reviews_title_fts SET
+            name = replace(replace(new.name, 'ё', 'е'), 'Ё', 'Е'),
+            description = replace(
+                replace(coalesce(new.description, ''), 'ё', 'е'), 'Ё', 'Е'
+            )
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title
+    BEGIN
+        DELETE FROM reviews_title_fts WHERE rowid = old.id;
+    END
+    """,
+)
+
+BACKWARD_SQL = (
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_year_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_sqlite(FORWARD_SQL), run_sqlite(BACKWARD_SQL)
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+TABLES = ('reviews_review', 'reviews_comments')
+NORMALIZED_TEXT = "replace(replace({}.text, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def forward_sql(table):
+    return (
+        f"""
+        CREATE VIRTUAL TABLE {table}_fts USING fts5(
+            text,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+        """,
+        f"""
+        INSERT INTO {table}_fts (rowid, text)
+        SELECT id, {NORMALIZED_TEXT.format(table)} FROM {table}
+        """,
+        f"""
+        CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {table}_fts (rowid, text)
+            VALUES (new.id, {NORMALIZED_TEXT.format('new')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_fts_update AFTER UPDATE OF text ON {table}
+        BEGIN
+            UPDATE {table}_fts SET text = {NORMALIZED_TEXT.format('new')}
+            WHERE rowid = new.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {table}_fts WHERE rowid = old.id;
+        END
+        """,
+    )
+
+
+def backward_sql(table):
+    return (
+        f'DROP TRIGGER IF EXISTS {table}_fts_insert',
+        f'DROP TRIGGER IF EXISTS {table}_fts_update',
+        f'DROP TRIGGER IF EXISTS {table}_fts_delete',
+        f'DROP TABLE IF EXISTS {table}_fts',
+    )
+
+
+def run_sqlite(build_sql):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for table in TABLES:
+            for statement in build_sql(table):
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_sqlite(forward_sql), run_sqlite(backward_sql)
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_version'),
+    ]
+
+    # Схема столбца не меняется, а пересоздание таблицы в SQLite удалило бы
+    # триггеры полнотекстового индекса, поэтому меняется только состояние.
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='review',
+                name='pub_date',
+                field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='дата отправки отзыва'),
+            ),
+        ]),
+    ]
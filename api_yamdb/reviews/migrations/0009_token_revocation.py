@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_review_pub_date_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user_id', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('revoked_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -1,6 +1,11 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .search import fts_enabled, match_query
 
 
 class User(AbstractUser):
@@ -49,6 +54,76 @@ class Genre(models.Model):
         return self.name
 
 
+class SearchQuerySet(models.QuerySet):
+    """Полнотекстовый поиск по индексу FTS5 `<таблица модели>_fts`.
+
+    На остальных базах откатывается на поиск подстроки без учёта регистра.
+    """
+
+    search_fields = ()
+    search_weights = ()
+
+    def search(self, text):
+        query = match_query(text)
+        if not query:
+            return self.none()
+        if not fts_enabled():
+            condition = Q()
+            for field in self.search_fields:
+                condition |= Q(**{f'{field}__icontains': text})
+            return self.filter(condition)
+        table = self.model._meta.db_table
+        index = f'{table}_fts'
+        weights = ''.join(f', {weight}' for weight in self.search_weights)
+        return self.extra(
+            tables=[index],
+            where=[f'{index}.rowid = {table}.id', f'{index} MATCH %s'],
+            params=[query],
+            select={'search_rank': f'bm25({index}{weights})'},
+        )
+
+
+class TitleQuerySet(SearchQuerySet):
+    search_fields = ('name', 'description')
+    search_weights = (10.0, 1.0)
+
+    def change_rating(self, score_delta, count_delta=0):
+        """Сдвигает сумму оценок и число отзывов на переданные значения."""
+        return self.update(
+            score_sum=F('score_sum') + score_delta,
+            review_count=F('review_count') + count_delta,
+        )
+
+    def recalculate_ratings(self):
+        """Пересчитывает сумму оценок и число отзывов по таблице отзывов."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('id')).values('total')),
+                0
+            ),
+        )
+
+    def search(self, text):
+        """Поиск по названию и описанию, лучшие совпадения первыми."""
+        queryset = super().search(text)
+        if fts_enabled() and match_query(text):
+            queryset = queryset.order_by(
+                'search_rank', *Title._meta.ordering
+            )
+        return queryset
+
+
+class TextSearchQuerySet(SearchQuerySet):
+    search_fields = ('text',)
+
+
 class Title(models.Model):
     name = models.TextField(max_length=256)
     year = models.PositiveSmallIntegerField()
@@ -60,19 +135,37 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         null=True,
     )
+    score_sum = models.PositiveIntegerField('сумма оценок', default=0)
+    review_count = models.PositiveIntegerField('количество отзывов', default=0)
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
-        ordering = ['-year']
+        ordering = ['-year', 'id']
+        indexes = [
+            models.Index(fields=['-year', 'id'], name='title_year_idx'),
+            models.Index(
+                fields=['category', '-year', 'id'],
+                name='title_category_year_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Целая часть средней оценки, None если отзывов нет."""
+        if self.review_count:
+            return self.score_sum // self.review_count
+
 
 class Review(models.Model):
     text = models.TextField('текст отзыва')
     pub_date = models.DateTimeField(
         'дата отправки отзыва',
-        auto_now_add=True
+        default=timezone.now,
+        editable=False
     )
     score = models.PositiveSmallIntegerField(
         'оценка по 10-ти бальной шкале',
@@ -94,8 +187,16 @@ class Review(models.Model):
         verbose_name='произведение',
     )
 
+    objects = TextSearchQuerySet.as_manager()
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', 'id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -126,8 +227,73 @@ class Comments(models.Model):
         verbose_name='пользователь, оставляющий комментарий',
     )
 
+    objects = TextSearchQuerySet.as_manager()
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', 'id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class Version(models.Model):
+    """Счётчик изменений ресурса, общий для всех процессов.
+
+    Процессы сверяют свои кэши с номером версии и сбрасывают их,
+    когда номер изменился.
+    """
+
+    key = models.CharField(max_length=100, primary_key=True)
+    number = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.key}: {self.number}'
+
+
+class TokenRevocation(models.Model):
+    """Роль в токенах пользователя, выданных до `revoked_at`, устарела.
+
+    Строка переживает удаление пользователя, поэтому хранится id,
+    а не внешний ключ.
+    """
+
+    user_id = models.PositiveIntegerField(primary_key=True)
+    revoked_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.revoked_at}'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку, доставляет его команда send_emails.
+
+    Отправленное письмо удаляется. Письмо, которое не ушло за все
+    попытки, остаётся с пустым `next_attempt_at` и текстом ошибки.
+    """
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.EmailField(max_length=254)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at', 'id'], name='email_next_attempt_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
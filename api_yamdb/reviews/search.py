@@ -0,0 +1,42 @@
+import re
+
+from django.db import connection
+
+WORD_RE = re.compile(r'\w+')
+
+# Окончания русских слов от длинных к коротким: отбрасываем их у слов
+# запроса и ищем по префиксу, чтобы «побега» находило «Побег».
+RUSSIAN_ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ие', 'ые', 'ов', 'ев',
+    'ах', 'ях', 'ам', 'ям', 'ом', 'ем', 'ую', 'юю', 'ть',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+
+def normalize(text):
+    """Приводит текст к виду, в котором он хранится в индексе."""
+    return text.lower().replace('ё', 'е')
+
+
+def stem(word):
+    for ending in RUSSIAN_ENDINGS:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)]
+    return word
+
+
+def match_query(text):
+    """Запрос FTS5: каждое слово ищется по основе как префикс, слова через AND.
+
+    Пользовательский ввод не попадает в синтаксис MATCH как есть,
+    поэтому кавычки и операторы в строке поиска не ломают запрос.
+    """
+    words = WORD_RE.findall(normalize(text))
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+def fts_enabled():
+    return connection.vendor == 'sqlite'
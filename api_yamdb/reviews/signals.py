@@ -0,0 +1,104 @@
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .autocomplete import INDEXES
+from .models import Category, Comments, Genre, Review, Title, User
+from .versions import (bump, comments_key, get_versions, rating_key,
+                       reviews_key, title_key)
+
+
+def catalog_changed(kind, instance, deleted=False):
+    """Сдвигает версию справочника и точечно обновляет индекс подсказок."""
+    index = INDEXES[kind]
+    bump(index.version_key)
+
+    def apply():
+        version = get_versions([index.version_key])[index.version_key]
+        index.apply(version, instance, deleted)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def catalog_saved(sender, instance, **kwargs):
+    catalog_changed(sender._meta.model_name, instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def catalog_deleted(sender, instance, **kwargs):
+    catalog_changed(sender._meta.model_name, instance, deleted=True)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def title_changed(sender, instance, **kwargs):
+    bump('titles', title_key(instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        title_ids = [instance.pk]
+    elif pk_set is not None:
+        title_ids = pk_set
+    else:
+        title_ids = []
+    bump('titles', *(title_key(title_id) for title_id in title_ids))
+
+
+def change_rating(title_id, score_delta, count_delta=0):
+    Title.objects.filter(pk=title_id).change_rating(score_delta, count_delta)
+    bump(reviews_key(title_id), rating_key(title_id), 'ratings')
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, raw, **kwargs):
+    """Запоминает прежние произведение и оценку отзыва."""
+    instance._previous = None
+    if instance.pk is not None and not raw:
+        instance._previous = Review.objects.filter(
+            pk=instance.pk
+        ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, raw, **kwargs):
+    """Сдвигает сумму оценок и число отзывов произведения."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous is None:
+        change_rating(instance.title_id, instance.score, 1)
+        return
+    title_id, score = previous
+    if title_id != instance.title_id:
+        change_rating(title_id, -score, -1)
+        change_rating(instance.title_id, instance.score, 1)
+    else:
+        change_rating(title_id, instance.score - score)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    change_rating(instance.title_id, -instance.score, -1)
+
+
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+def comment_changed(sender, instance, **kwargs):
+    bump(comments_key(instance.review_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    bump('users')
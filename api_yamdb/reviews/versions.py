@@ -0,0 +1,76 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Version
+
+
+def title_key(title_id):
+    return f'title:{title_id}'
+
+
+def rating_key(title_id):
+    return f'rating:{title_id}'
+
+
+def reviews_key(title_id):
+    return f'reviews:{title_id}'
+
+
+def comments_key(review_id):
+    return f'comments:{review_id}'
+
+
+def get_versions(keys):
+    """Текущие версии ключей одним запросом: {ключ: (номер, время)}.
+
+    Для ключа, который ещё ни разу не менялся, возвращается (0, None).
+    Сравнивать стоит всю пару: после пересоздания базы номера начинаются
+    заново, а время изменения уже другое.
+    """
+    versions = dict.fromkeys(keys, (0, None))
+    rows = Version.objects.filter(key__in=keys).values_list(
+        'key', 'number', 'modified'
+    )
+    for key, number, modified in rows:
+        versions[key] = (number, modified)
+    return versions
+
+
+def bump(*keys):
+    """Увеличивает версии ключей на единицу."""
+    now = timezone.now()
+    for key in keys:
+        updated = Version.objects.filter(key=key).update(
+            number=F('number') + 1, modified=now
+        )
+        if not updated:
+            version, created = Version.objects.get_or_create(
+                key=key, defaults={'number': 1}
+            )
+            if not created:
+                bump(key)
+
+
+def bump_many(keys, batch_size=500):
+    """Сдвигает версии большого набора ключей пакетами.
+
+    Существующие счётчики увеличиваются одним UPDATE на пакет, недостающие
+    создаются с номером 1: появление строки уже меняет пару (номер, время).
+    """
+    now = timezone.now()
+    keys = list(keys)
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        Version.objects.filter(key__in=batch).update(
+            number=F('number') + 1, modified=now
+        )
+        existing = set(
+            Version.objects.filter(key__in=batch).values_list('key', flat=True)
+        )
+        Version.objects.bulk_create(
+            [
+                Version(key=key, number=1, modified=now)
+                for key in batch if key not in existing
+            ],
+            ignore_conflicts=True
+        )
@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -31,6 +33,23 @@ def auth_client(user):
     return client
 
 
+def capture_queries(request, *args, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = request(*args, **kwargs)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+def count_queries(client, urls):
+    result = []
+    for url in urls:
+        response, queries = capture_queries(client.get, url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+        )
+        result.append(len(queries))
+    return result
+
+
 def create_categories(admin_client):
     data1 = {
         'name': 'Фильм',
@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    from django.core.cache import caches
+
+    from api.authentication import revocations, token_cache, user_cache
+    from reviews import catalog
+    from reviews.autocomplete import INDEXES
+
+    caches['titles'].clear()
+    for cache in (catalog.categories, catalog.genres, *INDEXES.values()):
+        cache.version = None
+    for cache in (user_cache, token_cache, revocations):
+        cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def pin_revocation_sync(settings):
+    # Отзывы синхронизируются при первом запросе с токеном и больше
+    # не добавляют запросов к БД по таймеру посреди теста.
+    settings.TOKEN_REVOCATION_SYNC_INTERVAL = 60 * 60
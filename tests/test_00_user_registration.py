@@ -1,6 +1,14 @@
+import smtplib
+from io import StringIO
+
 import pytest
 from django.contrib.auth import get_user_model
 from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from api import outbox
+from reviews.models import OutgoingEmail
 
 User = get_user_model()
 
@@ -85,6 +93,7 @@ class Test00UserRegistration:
         }
         request_type = 'POST'
         response = client.post(self.url_signup, data=valid_data)
+        call_command('send_emails', stdout=StringIO())
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != 404, (
@@ -132,6 +141,7 @@ class Test00UserRegistration:
         }
         request_type = 'POST'
         response = admin_client.post(self.url_admin_create_user, data=valid_data)
+        call_command('send_emails', stdout=StringIO())
         outbox_after = mail.outbox
 
         assert response.status_code != 404, (
@@ -279,3 +289,46 @@ class Test00UserRegistration:
             f'Проверьте, что при {request_type} запросе `{self.url_signup}` нельзя создать '
             f'пользователя, username которого уже зарегистрирован и возвращается статус {code}'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_00_signup_email_outbox(self, client, monkeypatch):
+        for index in range(3):
+            response = client.post(self.url_signup, data={
+                'email': f'queued{index}@yamdb.fake', 'username': f'queued{index}'
+            })
+            assert response.status_code == 200
+        assert len(mail.outbox) == 0 and OutgoingEmail.objects.count() == 3, (
+            f'Проверьте, что `{self.url_signup}` кладёт письмо в очередь, а не отправляет его в запросе'
+        )
+
+        send_messages = EmailBackend.send_messages
+        calls = []
+
+        def flaky_send(backend, messages):
+            calls.append(backend)
+            if len(calls) == 2:
+                raise smtplib.SMTPServerDisconnected('Соединение разорвано')
+            return send_messages(backend, messages)
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', flaky_send)
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == 2 and len({id(backend) for backend in calls}) == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        failed = OutgoingEmail.objects.get()
+        assert failed.attempts == 1 and failed.next_attempt_at > failed.created, (
+            'Проверьте, что неотправленное письмо остаётся в очереди со следующей попыткой позже'
+        )
+        assert outbox.retry_delay(3) == 4 * outbox.retry_delay(1), (
+            'Проверьте, что пауза между попытками растёт'
+        )
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что письмо не отправляется повторно раньше следующей попытки'
+        )
+        OutgoingEmail.objects.update(next_attempt_at=failed.created)
+        call_command('send_emails', stdout=StringIO())
+        assert len(mail.outbox) == 3 and not OutgoingEmail.objects.exists(), (
+            'Проверьте, что письмо уходит при следующей попытке и удаляется из очереди'
+        )
+        assert mail.outbox[2].to == [failed.to]
@@ -1,7 +1,38 @@
+import os
+import subprocess
+import sys
+
+import jwt
 import pytest
 from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from api import authentication
+from api.authentication import revocations, user_cache
+from api.views import get_tokens_for_user
+from reviews.models import Review, Title, User
+
+from .common import auth_client, capture_queries, create_users_api
+from .conftest import MANAGE_PATH
+
+ROLE_CHANGE_SCRIPT = '''
+import sys
+
+import django
+from django.conf import settings
 
-from .common import auth_client, create_users_api
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+django.setup()
+
+from django.core.management import call_command
+from reviews.models import TokenRevocation, User
+
+call_command('migrate', verbosity=0)
+user = User.objects.create_user(username='shell', email='shell@yamdb.fake', role='admin')
+user.role = 'user'
+user.save()
+print(TokenRevocation.objects.filter(user_id=user.pk).count())
+'''
 
 
 class Test01UserAPI:
@@ -571,3 +602,126 @@ class Test01UserAPI:
             'Проверьте, что при PATCH запросе `/api/v1/users/me/`, '
             'пользователь с ролью user не может сменить себе роль'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_12_cached_authentication(self, user_client, user, admin):
+        title = Title.objects.create(name='Фильм', year=2000, score_sum=10, review_count=2)
+        own = Review.objects.create(text='Свой', score=5, author=user, title=title)
+        other = Review.objects.create(text='Чужой', score=5, author=admin, title=title)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.get('/api/v1/users/me/')
+        response, queries = capture_queries(user_client.patch, f'{url}{own.id}/', data={'text': 'Исправленный'})
+        assert response.status_code == 200
+        assert not any('FROM "reviews_user"' in query for query in queries), (
+            'Проверьте, что аутентификация и проверка автора отзыва не загружают '
+            'пользователей из базы на каждый запрос'
+        )
+        response = user_client.delete(f'{url}{other.id}/')
+        assert response.status_code == 403
+        user.role = 'moderator'
+        user.save()
+        response = user_client.delete(f'{url}{other.id}/')
+        assert response.status_code == 204, (
+            'Проверьте, что после изменения пользователя кэш аутентификации '
+            'отдаёт его новую роль'
+        )
+        User.objects.filter(pk=user.pk).update(bio='Изменено в другом процессе')
+        response = user_client.patch('/api/v1/users/me/', data={'first_name': 'Имя'})
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert (user.first_name, user.bio) == ('Имя', 'Изменено в другом процессе'), (
+            'Проверьте, что PATCH запрос `/api/v1/users/me/` не перезаписывает '
+            'другие поля пользователя данными из кэша аутентификации'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_13_role_claims_and_revocation(self, admin_client, admin, user):
+        access = get_tokens_for_user(admin)['access']
+        claims = jwt.decode(access, options={'verify_signature': False})
+        assert (claims.get('role'), claims.get('is_superuser')) == ('admin', False), (
+            'Проверьте, что access-токен содержит роль и флаг суперпользователя'
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        User.objects.filter(pk=admin.pk).update(role='user')
+        user_cache.clear()
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что права администратора берутся из claims токена'
+        )
+        User.objects.filter(pk=admin.pk).update(role='admin')
+        user_cache.clear()
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user)["access"]}')
+        assert client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        assert response.status_code == 200
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли через `/api/v1/users/{username}/` '
+            'сразу действует для уже выданных токенов'
+        )
+        user.refresh_from_db()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user)["access"]}')
+        admin_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'user'})
+        revocations.clear()
+        user_cache.clear()
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что отзыв роли подтягивается из базы в другие процессы'
+        )
+
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(admin)["access"]}')
+        admin.refresh_from_db()
+        admin.bio = 'Новое описание'
+        admin.save()
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что сохранение пользователя без смены роли не отзывает его токены'
+        )
+        admin.role = 'user'
+        admin.save()
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что смена роли не через API сразу действует для уже выданных токенов'
+        )
+        user.refresh_from_db()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(user)["access"]}')
+        user.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что токены удалённого пользователя перестают действовать'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_14_verified_token_cache(self, admin, monkeypatch):
+        cache = authentication.token_cache
+        access = get_tokens_for_user(admin)['access']
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        for _ in range(3):
+            assert client.get('/api/v1/users/').status_code == 200
+        info = cache.cache_info()
+        assert (info.hits, info.misses, info.currsize) == (2, 1, 1), (
+            'Проверьте, что проверенный токен берётся из кэша при повторных запросах'
+        )
+        exp = jwt.decode(access, options={'verify_signature': False})['exp']
+        assert cache.entries[access.encode()][0] == exp, (
+            'Проверьте, что запись кэша токенов живёт до `exp` токена'
+        )
+        monkeypatch.setattr(authentication.time, 'time', lambda: exp)
+        client.get('/api/v1/users/')
+        assert cache.cache_info().misses == 2, (
+            'Проверьте, что истёкшая запись кэша токенов не используется'
+        )
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access[:-2]}xx')
+        assert client.get('/api/v1/users/').status_code == 401, (
+            'Проверьте, что токен с неверной подписью отклоняется'
+        )
+
+    def test_15_role_change_outside_api(self, tmp_path):
+        result = subprocess.run(
+            [sys.executable, '-c', ROLE_CHANGE_SCRIPT, str(tmp_path / 'db.sqlite3')],
+            cwd=MANAGE_PATH, env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'api_yamdb.settings'},
+            capture_output=True, text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == '1', (
+            'Проверьте, что смена роли из `manage.py shell` или команды отзывает роль '
+            'в выданных токенах без импорта API'
+        )
@@ -1,6 +1,7 @@
 import pytest
 
-from .common import auth_client, create_genre, create_users_api
+from .common import (auth_client, capture_queries, create_genre,
+                     create_users_api)
 
 
 class Test03GenreAPI:
@@ -166,3 +167,42 @@ class Test03GenreAPI:
             f'Проверьте, что при POST запросе на `{url}`, создание жанров недоступно для '
             f'пользователя с ролью moderator'
         )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_genre_process_cache(self, client, admin_client):
+        genres = create_genre(admin_client)
+        client.get('/api/v1/genres/')
+        response, queries = capture_queries(client.get, '/api/v1/genres/')
+        assert len(response.json()['results']) == len(genres) and len(queries) == 1, (
+            'Проверьте, что список `/api/v1/genres/` берётся из кэша процесса '
+            'после одной проверки версии'
+        )
+        admin_client.post('/api/v1/genres/', data={'name': 'Боевик', 'slug': 'action'})
+        response = client.get('/api/v1/genres/')
+        assert response.json()['results'][0] == {'name': 'Боевик', 'slug': 'action'}, (
+            'Проверьте, что кэш жанров сбрасывается при добавлении жанра'
+        )
+        admin_client.post('/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'})
+
+        def count_title_create(genre_slugs):
+            data = {'name': 'Поворот', 'year': 2000, 'genre': genre_slugs, 'category': 'films'}
+            response, queries = capture_queries(admin_client.post, '/api/v1/titles/', data=data)
+            assert response.status_code == 201
+            return len(queries)
+
+        count_title_create(['action'])
+        assert count_title_create(['action']) == count_title_create([genre['slug'] for genre in genres]), (
+            'Проверьте, что слаги жанров при создании произведения '
+            'разрешаются без отдельного запроса на каждый жанр'
+        )
+        data = {'name': 'Поворот', 'year': 2000, 'genre': ['action', 'drama'], 'category': 'films'}
+        response, queries = capture_queries(admin_client.post, '/api/v1/titles/', data=data)
+        assert response.status_code == 201
+        assert not [
+            query for query in queries
+            if query.startswith('SELECT') and 'WHERE' not in query
+            and ('FROM "reviews_category"' in query or 'FROM "reviews_genre"' in query)
+        ], (
+            'Проверьте, что при создании произведения категория и жанры берутся '
+            'из общего кэша справочников без чтения таблиц'
+        )
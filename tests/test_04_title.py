@@ -1,7 +1,14 @@
+import json
+
 import pytest
 
-from .common import (auth_client, create_categories, create_genre,
-                     create_titles, create_users_api)
+from api.pagination import TitlePagination
+from reviews.models import Title
+from reviews.versions import bump
+
+from .common import (auth_client, capture_queries, count_queries,
+                     create_categories, create_genre, create_titles,
+                     create_users_api)
 
 
 class Test04TitleAPI:
@@ -249,3 +256,176 @@ class Test04TitleAPI:
         user, moderator = create_users_api(admin_client)
         self.check_permissions(user, 'обычного пользователя', titles, categories, genres)
         self.check_permissions(moderator, 'модератора', titles, categories, genres)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_titles_query_count(self, client, admin_client, settings):
+        settings.CACHES = {**settings.CACHES, 'titles': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        titles, categories, genres = create_titles(admin_client)
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/?genre={genres[0]["slug"]}',
+            f'/api/v1/titles/?category={categories[0]["slug"]}&year=2000',
+            '/api/v1/titles/?name=Поворот',
+        )
+        before = count_queries(client, urls)
+        for year in range(1990, 1998):
+            data = {'name': f'Поворот {year}', 'year': year,
+                    'genre': [genres[0]['slug'], genres[1]['slug'], genres[2]['slug']],
+                    'category': categories[0]['slug']}
+            admin_client.post('/api/v1/titles/', data=data)
+        assert count_queries(client, urls) == before, (
+            'Проверьте, что число запросов к БД при GET запросах `/api/v1/titles/` '
+            'не зависит от количества произведений на странице'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_titles_cursor_pagination(self, client, admin_client, monkeypatch):
+        monkeypatch.setattr(TitlePagination, 'page_size', 2)
+        titles, categories, genres = create_titles(admin_client)
+        for year in (2000, 2000, 2010):
+            data = {'name': f'Поворот {year}', 'year': year, 'genre': [genres[0]['slug']],
+                    'category': categories[0]['slug']}
+            titles.append(admin_client.post('/api/v1/titles/', data=data).json())
+        expected = sorted(titles, key=lambda title: (-title['year'], title['id']))
+        for query, selected in (
+            ('', expected),
+            (f'&genre={genres[0]["slug"]}',
+             [title for title in expected if genres[0]['slug'] in str(title['genre'])]),
+            ('&year=2000', [title for title in expected if title['year'] == 2000]),
+        ):
+            url = f'/api/v1/titles/?pagination=cursor{query}'
+            received = []
+            while url:
+                data = client.get(url).json()
+                received += [title['id'] for title in data['results']]
+                url = data['next']
+            assert received == [title['id'] for title in selected], (
+                'Проверьте, что курсорная пагинация `/api/v1/titles/?pagination=cursor` '
+                'возвращает произведения по убыванию года и возрастанию id вместе с фильтрами'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_01_titles_cursor_pagination_ties(self, client, monkeypatch):
+        monkeypatch.setattr(TitlePagination, 'page_size', 100)
+        Title.objects.bulk_create(Title(name=f'Фильм {index}', year=2000) for index in range(1105))
+        Title.objects.create(name='Новый', year=2010)
+        Title.objects.create(name='Старый', year=1990)
+        bump('titles')
+        expected = list(Title.objects.order_by('-year', 'id').values_list('id', flat=True))
+        url = '/api/v1/titles/?pagination=cursor'
+        pages = []
+        while url:
+            data = client.get(url).json()
+            pages.append([title['id'] for title in data['results']])
+            url = data['next']
+            assert len(pages) <= 12, (
+                'Проверьте, что курсорная пагинация не зацикливается на произведениях одного года'
+            )
+        assert [pk for page in pages for pk in page] == expected, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/?pagination=cursor` проходит '
+            'больше 1000 произведений одного года без повторов и пропусков'
+        )
+        url = data['previous']
+        for page in reversed(pages[:-1]):
+            data = client.get(url).json()
+            assert [title['id'] for title in data['results']] == page, (
+                'Проверьте, что ссылка `previous` курсорной пагинации возвращает предыдущую страницу'
+            )
+            url = data['previous']
+        assert url is None
+        assert client.get('/api/v1/titles/?pagination=cursor&cursor=xyz').status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_titles_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+
+        def search(text):
+            response = client.get('/api/v1/titles/', {'search': text})
+            assert response.status_code == 200
+            return [title['id'] for title in response.json()['results']]
+
+        assert search('ПОВОРОТА') == [titles[0]['id']], (
+            'Проверьте, что параметр `search` ищет по названию без учёта регистра и окончаний'
+        )
+        assert search('драмы') == [titles[1]['id']], (
+            'Проверьте, что параметр `search` ищет по описанию произведения'
+        )
+        assert search('"пике*(') == [titles[0]['id']], (
+            'Проверьте, что спецсимволы в параметре `search` не приводят к ошибке'
+        )
+        for text in ('!!!', '-', '""'):
+            response = client.get('/api/v1/titles/', {'search': text})
+            assert response.status_code == 200 and response.json()['results'] == [], (
+                'Проверьте, что запрос `search` только из знаков препинания возвращает пустой список'
+            )
+        for name, year, description in (
+            ('Другое', 2020, 'Про побег'), ('Побег из Шоушенка', 1994, ''), ('Побег', 1990, ''),
+        ):
+            Title.objects.create(name=name, year=year, description=description)
+        ranked = search('побег')
+        response = client.get('/api/v1/titles/', {'search': 'побег', 'pagination': 'cursor'})
+        assert response.status_code == 200
+        assert [title['id'] for title in response.json()['results']] == ranked != sorted(ranked), (
+            'Проверьте, что `?search=` с `?pagination=cursor` сохраняет порядок по релевантности'
+        )
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Ёжик в тумане'})
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert search('ежик') == [titles[1]['id']] and search('поворот') == [], (
+            'Проверьте, что поисковый индекс обновляется при изменении и удалении произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_titles_bulk_create(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+
+        def items(count):
+            return [
+                {'name': f'Пакет {index}', 'year': 2001, 'description': 'Описание',
+                 'genre': [genres[0]['slug'], genres[1]['slug']], 'category': categories[1]['slug']}
+                for index in range(count)
+            ]
+
+        response, small = capture_queries(admin_client.post, '/api/v1/titles/', data=items(2), format='json')
+        assert response.status_code == 201 and len(response.json()) == 2, (
+            'Проверьте, что POST запрос `/api/v1/titles/` со списком создаёт все произведения'
+        )
+        response, large = capture_queries(admin_client.post, '/api/v1/titles/', data=items(20), format='json')
+        assert response.status_code == 201 and len(large) == len(small), (
+            'Проверьте, что число запросов при создании списка произведений не зависит от его длины'
+        )
+        created = response.json()[-1]
+        assert created['name'] == 'Пакет 19' and created['genre'] == [genres[0]['slug'], genres[1]['slug']]
+        detail = client.get(f'/api/v1/titles/{created["id"]}/').json()
+        assert detail['name'] == 'Пакет 19' and detail['category'] == categories[1] and sorted(
+            genre['slug'] for genre in detail['genre']
+        ) == sorted([genres[0]['slug'], genres[1]['slug']]), (
+            'Проверьте, что созданные списком произведения доступны с жанрами и категорией'
+        )
+        response = client.get('/api/v1/autocomplete/?q=пакет 19&type=title')
+        assert [item['id'] for item in response.json()] == [created['id']], (
+            'Проверьте, что созданные списком произведения попадают в подсказки'
+        )
+        response = client.get('/api/v1/titles/?category=' + categories[1]['slug'])
+        assert response.json()['count'] == 22 + sum(
+            title['category'] == categories[1]['slug'] for title in titles
+        )
+
+        count = Title.objects.count()
+        data = items(3)
+        data[1]['genre'] = ['unknown']
+        data[2]['year'] = 3000
+        response = admin_client.post('/api/v1/titles/', data=data, format='json')
+        errors = response.json()
+        assert response.status_code == 400 and errors[0] == {} and 'genre' in errors[1] and 'year' in errors[2], (
+            'Проверьте, что при ошибках POST запрос со списком возвращает ошибки по каждому элементу'
+        )
+        assert Title.objects.count() == count, (
+            'Проверьте, что при ошибке в одном элементе не создаётся ни одно произведение'
+        )
+        response = admin_client.post('/api/v1/titles/', data=[], format='json')
+        assert response.status_code == 400
+        response = client.post(
+            '/api/v1/titles/', data=json.dumps(items(1)), content_type='application/json'
+        )
+        assert response.status_code == 401
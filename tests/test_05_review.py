@@ -1,7 +1,14 @@
+from io import StringIO
+
 import pytest
+from django.core.management import call_command
+
+from api.pagination import PubDatePagination
+from reviews.models import Comments, Review, Title, User
+from reviews.versions import bump, rating_key
 
-from .common import (auth_client, create_reviews, create_titles,
-                     create_users_api)
+from .common import (auth_client, capture_queries, create_reviews,
+                     create_titles, create_users_api)
 
 
 class Test05ReviewAPI:
@@ -334,3 +341,204 @@ class Test05ReviewAPI:
             'без токена авторизации возвращается статус 401'
         )
         self.check_permissions(user, 'обычного пользователя', reviews, titles)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_review_rating_stored(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются `score_sum` и `review_count` произведения'
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/', data={'score': 10}
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count, title.rating) == (14, 2, 7), (
+            'Проверьте, что при изменении и удалении отзыва пересчитывается рейтинг произведения'
+        )
+        Title.objects.update(score_sum=0, review_count=0)
+        bump('ratings', *(rating_key(title['id']) for title in titles))
+        urls = (f'/api/v1/titles/{titles[0]["id"]}/', '/api/v1/titles/?year=2000')
+        assert admin_client.get(urls[0]).json()['rating'] is None
+        assert admin_client.get(urls[1]).json()['results'][0]['rating'] is None
+        call_command('recalculate_ratings', stdout=StringIO())
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (14, 2), (
+            'Проверьте, что команда `recalculate_ratings` пересчитывает рейтинг по отзывам'
+        )
+        assert admin_client.get(urls[0]).json()['rating'] == 7 and admin_client.get(
+            urls[1]
+        ).json()['results'][0]['rating'] == 7, (
+            'Проверьте, что команда `recalculate_ratings` сбрасывает кэш рейтингов произведений'
+        )
+        admin_client.delete(f'/api/v1/users/{moderator.username}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (10, 1), (
+            'Проверьте, что рейтинг пересчитывается, когда отзывы удаляются вместе с автором'
+        )
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.score = 6
+        review.title_id = titles[1]['id']
+        review.save()
+        title.refresh_from_db()
+        other = Title.objects.get(pk=titles[1]['id'])
+        assert (title.review_count, other.score_sum, other.review_count) == (0, 6, 1), (
+            'Проверьте, что рейтинг пересчитывается при изменении отзыва не через API'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_review_cursor_pagination(self, client, admin_client, admin, monkeypatch):
+        monkeypatch.setattr(PubDatePagination, 'page_size', 2)
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?pagination=cursor'
+        received = []
+        while url:
+            data = client.get(url).json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация `?pagination=cursor` не возвращает `count`'
+            )
+            received += [review['id'] for review in data['results']]
+            url = data['next']
+        assert received == [review['id'] for review in reversed(reviews)], (
+            'Проверьте, что курсорная пагинация отзывов возвращает все отзывы '
+            'от новых к старым без повторов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_reviews_and_comments_query_count(self, client, admin, monkeypatch):
+        monkeypatch.setattr(PubDatePagination, 'page_size', 100)
+        title = Title.objects.create(name='Поворот туда', year=2000)
+        review = Review.objects.create(text='Первый', score=5, author=admin, title=title)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        urls = (url, f'{url}{review.id}/comments/', f'{url}{review.id}/')
+
+        def count_queries():
+            result = []
+            for item in urls:
+                response, queries = capture_queries(client.get, item)
+                assert response.status_code == 200
+                assert not any('FROM "reviews_user"' in query for query in queries), (
+                    f'Проверьте, что GET запрос `{item}` не загружает авторов отдельными запросами'
+                )
+                result.append(len(queries))
+            return result
+
+        Comments.objects.create(text='Первый', author=admin, review=review)
+        before = count_queries()
+        User.objects.bulk_create(
+            User(username=f'reader{index}', email=f'reader{index}@yamdb.fake')
+            for index in range(99)
+        )
+        users = User.objects.filter(username__startswith='reader')
+        Review.objects.bulk_create(
+            Review(text='Отзыв', score=7, author=user, title=title) for user in users
+        )
+        Comments.objects.bulk_create(
+            Comments(text='Комментарий', author=user, review=review) for user in users
+        )
+        response = client.get(url)
+        assert len(response.json()['results']) == 100
+        assert count_queries() == before, (
+            'Проверьте, что авторы отзывов и комментариев загружаются '
+            'в том же запросе, что и сами записи'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_bulk_reviews(self, admin_client, admin, user_client):
+        titles = [Title.objects.create(name=f'Фильм {index}', year=2000) for index in range(3)]
+        User.objects.bulk_create(
+            User(username=f'critic{index}', email=f'critic{index}@yamdb.fake')
+            for index in range(200)
+        )
+        data = [
+            {
+                'title': titles[index % 3].id,
+                'author': f'critic{index}',
+                'text': 'Перенесённый отзыв',
+                'score': index % 10 + 1,
+                'pub_date': '2019-09-24T21:08:21.567Z',
+            }
+            for index in range(200)
+        ]
+        url = '/api/v1/reviews/bulk/'
+        response = user_client.post(url, data=data, format='json')
+        assert response.status_code == 403, (
+            f'Проверьте, что POST запрос `{url}` доступен только администратору'
+        )
+        response, queries = capture_queries(admin_client.post, url, data=data, format='json')
+        assert response.status_code == 201, (
+            f'Проверьте, что POST запрос `{url}` со списком отзывов возвращает статус 201'
+        )
+        assert response.json() == {'created': 200}
+        assert len(queries) < 30, (
+            f'Проверьте, что POST запрос `{url}` проверяет и сохраняет отзывы '
+            'пакетами, а не отдельными запросами на каждый отзыв'
+        )
+        for title in titles:
+            title.refresh_from_db()
+            scores = [item['score'] for item in data if item['title'] == title.id]
+            assert (title.score_sum, title.review_count) == (sum(scores), len(scores)), (
+                'Проверьте, что пакетная загрузка отзывов обновляет рейтинг произведений'
+            )
+        assert Review.objects.filter(pub_date__year=2019).count() == 200, (
+            'Проверьте, что пакетная загрузка сохраняет переданную дату отзыва'
+        )
+
+        response = admin_client.post(url, data=[
+            {key: value for key, value in data[0].items() if key != 'pub_date'},
+            {'title': titles[0].id, 'author': 'nobody', 'text': 'Текст', 'score': 5},
+            {'title': titles[0].id, 'author': admin.username, 'text': 'Текст', 'score': 5},
+        ], format='json')
+        assert response.status_code == 400, (
+            f'Проверьте, что POST запрос `{url}` с повторным отзывом или '
+            'несуществующим автором возвращает статус 400'
+        )
+        errors = response.json()
+        assert 'non_field_errors' in errors[0] and 'author' in errors[1] and errors[2] == {}, (
+            f'Проверьте, что POST запрос `{url}` возвращает ошибки по каждому отзыву'
+        )
+        assert Review.objects.count() == 200, (
+            'Проверьте, что при ошибке в пакете не сохраняется ни один отзыв'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_09_nested_routes_resolve_parent_once(self, admin_client, admin):
+        title, other = (Title.objects.create(name=name, year=2000) for name in ('Один', 'Два'))
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response, queries = capture_queries(admin_client.post, url, data={'text': 'Отзыв', 'score': 7})
+        assert response.status_code == 201
+        selects = [
+            query for query in queries
+            if query.startswith('SELECT') and (
+                'FROM "reviews_title"' in query or 'FROM "reviews_review"' in query
+            )
+        ]
+        assert len(selects) == 1, (
+            f'Проверьте, что POST запрос `{url}` загружает произведение один раз '
+            'и не проверяет уникальность отзыва отдельным запросом'
+        )
+        response = admin_client.post(url, data={'text': 'Ещё отзыв', 'score': 3})
+        assert response.status_code == 400 and 'non_field_errors' in response.json(), (
+            f'Проверьте, что повторный POST запрос `{url}` возвращает статус 400'
+        )
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (7, 1), (
+            'Проверьте, что отклонённый повторный отзыв не меняет рейтинг произведения'
+        )
+
+        review = Review.objects.get()
+        comment = Comments.objects.create(text='Комментарий', author=admin, review=review)
+        for item in (
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/',
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/',
+            f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/{comment.id}/',
+        ):
+            assert admin_client.get(item).status_code == 404, (
+                f'Проверьте, что GET запрос `{item}` к отзыву другого произведения возвращает статус 404'
+            )
+        response, queries = capture_queries(admin_client.get, f'{url}{review.id}/comments/{comment.id}/')
+        assert response.status_code == 200
+        assert sum('FROM "reviews_review"' in query for query in queries) == 0, (
+            'Проверьте, что комментарий, отзыв и произведение из адреса проверяются одним запросом'
+        )
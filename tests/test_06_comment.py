@@ -1,5 +1,10 @@
+import gzip
+import json
+
 import pytest
 
+from api import export
+
 from .common import auth_client, create_comments, create_reviews
 
 
@@ -246,3 +251,84 @@ class Test06CommentAPI:
             'без токена авторизации возвращается статус 401'
         )
         self.check_permissions(user, 'обычного пользователя', f'{pre_url}{comments[2]["id"]}/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_search_reviews_and_comments(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'text': 'Гениальные диалоги и музыка'}
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/{comments[2]["id"]}/',
+            data={'text': 'Согласен про диалог'}
+        )
+        response = client.get('/api/v1/search/reviews/', {'q': 'диалоги'})
+        assert response.status_code == 401, (
+            'Проверьте, что поиск `/api/v1/search/reviews/` недоступен без токена авторизации'
+        )
+        response = auth_client(user).get('/api/v1/search/reviews/', {'q': 'диалоги'})
+        assert response.status_code == 403, (
+            'Проверьте, что поиск `/api/v1/search/reviews/` недоступен обычному пользователю'
+        )
+        client_moderator = auth_client(moderator)
+        data = client_moderator.get('/api/v1/search/reviews/', {'q': 'диалог'}).json()
+        assert [review['id'] for review in data['results']] == [reviews[1]['id']], (
+            'Проверьте, что `/api/v1/search/reviews/?q=` находит отзывы по тексту'
+        )
+        assert 'next' in data and 'count' not in data, (
+            'Проверьте, что результаты поиска отзывов возвращаются с курсорной пагинацией'
+        )
+        data = client_moderator.get(
+            '/api/v1/search/reviews/', {'q': 'диалог', 'author': moderator.username}
+        ).json()
+        assert data['results'] == [], (
+            'Проверьте, что поиск отзывов фильтруется по автору'
+        )
+        data = client_moderator.get(
+            '/api/v1/search/comments/',
+            {'q': 'диалоги', 'title': titles[0]['id'], 'pub_date_after': '2000-01-01T00:00:00'}
+        ).json()
+        assert [comment['id'] for comment in data['results']] == [comments[2]['id']], (
+            'Проверьте, что `/api/v1/search/comments/?q=` находит комментарии по тексту с фильтрами'
+        )
+        data = client_moderator.get(
+            '/api/v1/search/comments/', {'q': 'диалоги', 'pub_date_before': '2000-01-01T00:00:00'}
+        ).json()
+        assert data['results'] == [], (
+            'Проверьте, что поиск комментариев фильтруется по интервалу дат'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_reviews_export(self, client, admin_client, admin, monkeypatch):
+        monkeypatch.setattr(export, 'CHUNK_SIZE', 2)
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        admin_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[2]["id"]}/comments/',
+            data={'text': 'Последний'}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/export/'
+        response = client.get(url)
+        assert response.status_code == 200 and response.streaming, (
+            f'Проверьте, что GET запрос `{url}` отдаёт потоковый ответ'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        body = b''.join(response.streaming_content)
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        assert [line['id'] for line in lines] == sorted(review['id'] for review in reviews), (
+            'Проверьте, что экспорт содержит все отзывы произведения по возрастанию id'
+        )
+        assert [comment['text'] for comment in lines[0]['comments']] == ['qwerty', 'qwerty123', 'qwerty321'], (
+            'Проверьте, что каждый отзыв в экспорте содержит свои комментарии'
+        )
+        assert lines[1]['comments'] == [] and [
+            comment['text'] for comment in lines[2]['comments']
+        ] == ['Последний']
+        assert lines[0]['author'] == admin.username and lines[0]['score'] == 5
+
+        response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip', (
+            f'Проверьте, что GET запрос `{url}` сжимает ответ, если клиент принимает gzip'
+        )
+        assert gzip.decompress(b''.join(response.streaming_content)) == body
+        assert client.get('/api/v1/titles/100500/reviews/export/').status_code == 404
@@ -0,0 +1,81 @@
+import pytest
+
+from reviews.autocomplete import PrefixIndex
+from reviews.models import Genre
+from reviews.versions import bump
+
+from .common import create_titles
+
+
+class Test08AutocompleteAPI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_autocomplete(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get('/api/v1/autocomplete/', {'q': 'П'})
+        assert response.status_code == 200, (
+            'Проверьте, что GET запрос `/api/v1/autocomplete/` без токена авторизации возвращает статус 200'
+        )
+        assert response.json() == [
+            {'type': 'title', 'id': titles[0]['id'], 'name': 'Поворот туда'},
+            {'type': 'title', 'id': titles[1]['id'], 'name': 'Проект'},
+        ], (
+            'Проверьте, что `/api/v1/autocomplete/?q=` возвращает названия, начинающиеся с префикса, '
+            'в алфавитном порядке'
+        )
+        response = client.get('/api/v1/autocomplete/', {'q': 'туд'})
+        assert [item['name'] for item in response.json()] == ['Поворот туда'], (
+            'Проверьте, что `/api/v1/autocomplete/` находит названия по началу любого слова'
+        )
+        response = client.get('/api/v1/autocomplete/', {'q': 'ко', 'type': ['genre', 'category']})
+        assert response.json() == [{'type': 'genre', 'slug': 'comedy', 'name': 'Комедия'}], (
+            'Проверьте, что `/api/v1/autocomplete/` фильтрует подсказки по параметру `type`'
+        )
+        response = client.get('/api/v1/autocomplete/', {'q': 'п', 'limit': 1})
+        assert len(response.json()) == 1, (
+            'Проверьте, что `/api/v1/autocomplete/` ограничивает число подсказок параметром `limit`'
+        )
+        response = client.get('/api/v1/autocomplete/')
+        assert response.status_code == 400, (
+            'Проверьте, что GET запрос `/api/v1/autocomplete/` без параметра `q` возвращает статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_autocomplete_updates(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        client.get('/api/v1/autocomplete/', {'q': 'п'})
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/', data={'name': 'Побег'})
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get('/api/v1/autocomplete/', {'q': 'п'})
+        assert response.json() == [{'type': 'title', 'id': titles[1]['id'], 'name': 'Побег'}], (
+            'Проверьте, что подсказки обновляются при изменении и удалении произведений'
+        )
+        Genre.objects.filter(slug='drama').update(name='Детектив')
+        bump('genres')
+        response = client.get('/api/v1/autocomplete/', {'q': 'де'})
+        assert response.json() == [{'type': 'genre', 'slug': 'drama', 'name': 'Детектив'}], (
+            'Проверьте, что подсказки перестраиваются при изменении версии справочника в другом процессе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_autocomplete_no_rebuild(self, client, admin_client, monkeypatch):
+        titles, categories, genres = create_titles(admin_client)
+        client.get('/api/v1/autocomplete/', {'q': 'п'})
+        rebuilds = []
+        rebuild = PrefixIndex.rebuild
+
+        def counting_rebuild(index, version):
+            rebuilds.append(index.kind)
+            rebuild(index, version)
+
+        monkeypatch.setattr(PrefixIndex, 'rebuild', counting_rebuild)
+        data = {'name': 'Погоня', 'year': 1990, 'genre': [genres[0]['slug'], genres[2]['slug']],
+                'category': categories[0]['slug']}
+        admin_client.post('/api/v1/titles/', data=data)
+        response = client.get('/api/v1/autocomplete/', {'q': 'пог'})
+        assert [item['name'] for item in response.json()] == ['Погоня'], (
+            'Проверьте, что новое произведение сразу появляется в подсказках'
+        )
+        assert rebuilds == [], (
+            'Проверьте, что создание произведения с жанрами в этом процессе не перестраивает индекс подсказок'
+        )
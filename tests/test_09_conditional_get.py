@@ -0,0 +1,54 @@
+import pytest
+
+from .common import capture_queries, create_reviews
+
+
+class Test09ConditionalGet:
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == 200 and response.has_header('ETag'), (
+            f'Проверьте, что GET запрос `{url}` возвращает заголовок `ETag`'
+        )
+        assert response.has_header('Last-Modified'), (
+            f'Проверьте, что GET запрос `{url}` возвращает заголовок `Last-Modified`'
+        )
+        etag = response['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and response['ETag'] == etag, (
+            f'Проверьте, что GET запрос `{url}` с совпадающим `If-None-Match` возвращает статус 304'
+        )
+        return etag
+
+    def check_modified(self, client, url, etag):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, (
+            f'Проверьте, что после изменения данных GET запрос `{url}` '
+            'с прежним `If-None-Match` возвращает статус 200 и новый `ETag`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_conditional_get(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        urls = (
+            '/api/v1/titles/',
+            title_url,
+            f'{title_url}reviews/',
+            f'{title_url}reviews/{reviews[0]["id"]}/comments/',
+        )
+        etags = [self.check_not_modified(client, url) for url in urls]
+        response, queries = capture_queries(client.get, urls[0], HTTP_IF_NONE_MATCH=etags[0])
+        assert len(queries) == 1, (
+            'Проверьте, что ответ 304 строится по счётчикам версий одним запросом к БД'
+        )
+
+        admin_client.patch(f'{title_url}reviews/{reviews[0]["id"]}/', data={'score': 10})
+        for url, etag in zip(urls[:3], etags):
+            self.check_modified(client, url, etag)
+        admin_client.post(f'{title_url}reviews/{reviews[0]["id"]}/comments/', data={'text': 'Точно'})
+        self.check_modified(client, urls[3], etags[3])
+
+        etag = self.check_not_modified(admin_client, '/api/v1/users/')
+        admin_client.patch(f'/api/v1/users/{user.username}/', data={'bio': 'Новое'})
+        self.check_modified(admin_client, '/api/v1/users/', etag)
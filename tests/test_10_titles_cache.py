@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+
+from api.caching import TitleDetailCache
+
+from .common import capture_queries, create_titles
+
+
+class Test10TitlesCache:
+
+    def count_queries(self, client, url):
+        response, queries = capture_queries(client.get, url)
+        assert response.status_code == 200
+        return len(queries), response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_list_cache(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        count, data = self.count_queries(client, '/api/v1/titles/?year=2000&category=films')
+        cached_count, cached_data = self.count_queries(client, '/api/v1/titles/?category=films&year=2000')
+        assert cached_data == data and cached_count == 2, (
+            'Проверьте, что повторный GET запрос `/api/v1/titles/` с теми же параметрами '
+            'в другом порядке отдаётся из кэша после проверки версий'
+        )
+        self.count_queries(client, '/api/v1/titles/?year=2020')
+        admin_client.post(f'/api/v1/titles/{titles[1]["id"]}/reviews/', data={'text': 'Да', 'score': 8})
+        count, data = self.count_queries(client, '/api/v1/titles/?year=2000&category=films')
+        assert count == 2, (
+            'Проверьте, что отзыв на произведение не сбрасывает кэш страниц без этого произведения'
+        )
+        count, data = self.count_queries(client, '/api/v1/titles/?year=2020')
+        assert count > 2 and data['results'][0]['rating'] == 8, (
+            'Проверьте, что отзыв на произведение сбрасывает кэш страниц с этим произведением'
+        )
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/', data={'genre': [genres[2]['slug']]})
+        count, data = self.count_queries(client, '/api/v1/titles/?year=2000&category=films')
+        assert data['results'][0]['genre'] == [genres[2]], (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш списка произведений'
+        )
+        admin_client.post('/api/v1/genres/', data={'name': 'Боевик', 'slug': 'action'})
+        count, data = self.count_queries(client, '/api/v1/titles/?year=2000&category=films')
+        assert count > 2, (
+            'Проверьте, что изменение справочника жанров сбрасывает кэш списка произведений'
+        )
+
+    @pytest.mark.parametrize('backend', ['file', 'shm'])
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_cache_backends(self, client, admin_client, backend, tmp_path):
+        caches = dict(settings.CACHES)
+        caches['titles'] = dict(
+            settings.TITLES_CACHE_BACKENDS[backend], LOCATION=str(tmp_path / 'titles')
+        )
+        with override_settings(CACHES=caches):
+            create_titles(admin_client)
+            count, data = self.count_queries(client, '/api/v1/titles/')
+            cached_count, cached_data = self.count_queries(client, '/api/v1/titles/')
+        assert cached_data == data and cached_count == 2, (
+            f'Проверьте, что кэш списка произведений работает с бэкендом `{backend}`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_detail_single_flight(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        calls = []
+
+        def compute(pk):
+            calls.append(pk)
+            time.sleep(0.2)
+            return {'id': pk}
+
+        results = []
+
+        def worker():
+            try:
+                results.append(TitleDetailCache().get(titles[0]['id'], compute))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1 and results == [({'id': titles[0]['id']}, False)] * 5, (
+            'Проверьте, что карточку произведения при одновременных запросах '
+            'рассчитывает только один поток'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_title_detail_stale_while_revalidate(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+        admin_client.post(f'{url}reviews/', data={'text': 'Да', 'score': 8})
+        response = client.get(url)
+        assert response.json()['rating'] is None and not response.has_header('ETag'), (
+            'Проверьте, что после нового отзыва анонимный GET запрос карточки '
+            'произведения сразу получает прежние данные без `ETag`'
+        )
+        assert admin_client.get(url).json()['rating'] == 8, (
+            'Проверьте, что авторизованный пользователь сразу видит новый рейтинг'
+        )
+        deadline = time.monotonic() + 3
+        while client.get(url).json()['rating'] != 8:
+            assert time.monotonic() < deadline, (
+                'Проверьте, что устаревшая карточка произведения обновляется в фоне'
+            )
+            time.sleep(0.05)
+        admin_client.patch(url, data={'name': 'Новое имя'})
+        assert client.get(url).json()['name'] == 'Новое имя', (
+            'Проверьте, что изменение произведения сразу видно в карточке'
+        )
@@ -0,0 +1,29 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.readers import CommentsReader, ReviewReader, TitleReader
+from api.serializers import (CommentsSerializer, ReviewSerializer,
+                             TitleSerializer)
+from reviews.models import Comments, Review, Title
+
+from .common import create_comments
+
+
+class Test11ValuesReaders:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_readers_match_serializers(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        Title.objects.create(name='Без категории', year=1999)
+        cases = (
+            (Title.objects.all(), TitleSerializer, TitleReader()),
+            (Review.objects.all(), ReviewSerializer, ReviewReader()),
+            (Comments.objects.all(), CommentsSerializer, CommentsReader()),
+        )
+        renderer = JSONRenderer()
+        for queryset, serializer_class, reader in cases:
+            expected = renderer.render(serializer_class(queryset, many=True).data)
+            assert renderer.render(reader.read(reader.values(queryset))) == expected, (
+                f'Проверьте, что `{type(reader).__name__}` строит тот же ответ, '
+                f'что и `{serializer_class.__name__}`'
+            )
@@ -0,0 +1,147 @@
+import csv
+import datetime as dt
+import gzip
+import json
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+
+from api.authentication import revocations
+from api.views import get_tokens_for_user
+from reviews.models import Comments, Genre, Review, Title, User
+from reviews.versions import get_versions, rating_key, title_key
+
+
+class Test12ImportCsv:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_csv(self, client, admin_client):
+        call_command('import_csv', batch_size=7, stdout=StringIO())
+        assert (
+            User.objects.count(), Genre.objects.count(), Title.objects.count(),
+            Title.genre.through.objects.count(), Review.objects.count(),
+            Comments.objects.count()
+        ) == (6, 15, 32, 42, 72, 3), (
+            'Проверьте, что команда `import_csv` загружает все строки CSV-файлов'
+        )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date == dt.datetime(2019, 9, 24, 21, 8, 21, 567000, tzinfo=dt.timezone.utc), (
+            'Проверьте, что команда `import_csv` сохраняет даты публикации из файла'
+        )
+        assert User.objects.get(username='bingobongo').check_password('P@ssw0rd'), (
+            'Проверьте, что команда `import_csv` хэширует пароли пользователей'
+        )
+        hashes = User.objects.filter(username__in=['bingobongo', 'capt_obvious']).values_list('password', flat=True)
+        assert len(set(hashes)) == 2, (
+            'Проверьте, что одинаковые пароли при загрузке хэшируются с разной солью'
+        )
+        response = client.get('/api/v1/titles/1/')
+        assert response.json()['rating'] == 10, (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг произведений'
+        )
+        response = client.get('/api/v1/autocomplete/?q=побег')
+        assert [item['name'] for item in response.json()] == ['Побег из Шоушенка'], (
+            'Проверьте, что после загрузки обновляется индекс подсказок'
+        )
+        response = admin_client.post('/api/v1/genres/', data={'name': 'Боевик', 'slug': 'action'})
+        assert response.status_code == 201 and Genre.objects.get(slug='action').pk > 15
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_import_csv_upsert(self, tmp_path):
+        call_command('import_csv', stdout=StringIO())
+        keys = ['titles', 'ratings', title_key(1), title_key(2), rating_key(1)]
+        versions = get_versions(keys)
+        output = StringIO()
+        call_command('import_csv', upsert=True, stdout=output)
+        assert 'добавлено 0, изменено 0, без изменений 72' in output.getvalue(), (
+            'Проверьте, что повторная загрузка с `--upsert` не изменяет строки'
+        )
+        assert get_versions(keys) == versions and Review.objects.count() == 72, (
+            'Проверьте, что повторная загрузка без изменений не сбрасывает кэши'
+        )
+
+        path = tmp_path / 'data'
+        shutil.copytree(f'{settings.BASE_DIR}/static/data', path)
+        titles = (path / 'titles.csv').read_text(encoding='utf-8')
+        (path / 'titles.csv').write_text(
+            titles.replace('2,Крестный отец,', '2,Крёстный отец,'), encoding='utf-8'
+        )
+        with open(path / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write('\n500,1,Новый,102,1,2021-01-01T00:00:00.000Z\n')
+        output = StringIO()
+        call_command('import_csv', 'titles', 'review', upsert=True, path=str(path), stdout=output)
+        assert 'titles.csv: добавлено 0, изменено 1, без изменений 31' in output.getvalue()
+        assert 'review.csv: добавлено 1, изменено 0, без изменений 72' in output.getvalue(), (
+            'Проверьте, что `--upsert` сообщает число добавленных, изменённых и пропущенных строк'
+        )
+        assert Title.objects.get(pk=2).name == 'Крёстный отец'
+        assert Title.objects.get(pk=1).review_count == 3
+        changed = get_versions(keys)
+        assert changed[title_key(1)] == versions[title_key(1)] and all(
+            changed[key] != versions[key] for key in ('titles', 'ratings', title_key(2), rating_key(1))
+        ), (
+            'Проверьте, что `--upsert` сдвигает версии только изменённых объектов'
+        )
+
+        admin = User.objects.get(username='capt_obvious')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_tokens_for_user(admin)["access"]}')
+        assert client.get('/api/v1/users/').status_code == 200
+        users = (path / 'users.csv').read_text(encoding='utf-8')
+        (path / 'users.csv').write_text(
+            users.replace('capt_obvious@yamdb.fake,admin,', 'capt_obvious@yamdb.fake,user,'), encoding='utf-8'
+        )
+        call_command('import_csv', 'users', upsert=True, path=str(path), stdout=StringIO())
+        revocations.clear()
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что смена роли через `import_csv --upsert` отзывает роль в выданных токенах'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_import_csv_workers(self, tmp_path):
+        call_command('import_csv', workers=2, batch_size=5, stdout=StringIO())
+        assert (Title.objects.count(), Review.objects.count(), Comments.objects.count()) == (32, 72, 3), (
+            'Проверьте, что команда `import_csv --workers` загружает все строки в порядке внешних ключей'
+        )
+        assert Title.objects.get(pk=1).rating == 10
+
+        path = tmp_path / 'data'
+        shutil.copytree(f'{settings.BASE_DIR}/static/data', path)
+        with open(path / 'review.csv', 'a', encoding='utf-8') as file:
+            file.write('\n500,2,Плохая оценка,102,11,2021-01-01T00:00:00.000Z\n')
+        with pytest.raises(CommandError, match='review.csv, запись 73: score'):
+            call_command('import_csv', 'review', upsert=True, workers=2, path=str(path), stdout=StringIO())
+        assert not Review.objects.filter(pk=500).exists(), (
+            'Проверьте, что файл с ошибками в строках не загружается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_export_data(self, tmp_path):
+        def read(path):
+            with open(path, encoding='utf-8', newline='') as file:
+                header, *rows = csv.reader(file)
+            return header, sorted(rows, key=lambda row: int(row[0]))
+
+        call_command('import_csv', stdout=StringIO())
+        call_command('export_data', output=str(tmp_path), jobs=2, chunk_size=5, stdout=StringIO())
+        for name in ('category', 'genre', 'titles', 'genre_title', 'review', 'comments'):
+            assert read(tmp_path / f'{name}.csv') == read(f'{settings.BASE_DIR}/static/data/{name}.csv'), (
+                f'Проверьте, что команда `export_data` выгружает `{name}.csv` в колонках static/data'
+            )
+
+        call_command(
+            'export_data', 'review', output=str(tmp_path), format='ndjson', gzip=True, stdout=StringIO()
+        )
+        with gzip.open(tmp_path / 'review.ndjson.gz', 'rt', encoding='utf-8') as file:
+            lines = [json.loads(line) for line in file]
+        assert len(lines) == 72 and [line['id'] for line in lines] == sorted(line['id'] for line in lines) and lines[0] == {
+            'id': 1, 'title_id': 1, 'text': lines[0]['text'], 'author': 100, 'score': 10,
+            'pub_date': '2019-09-24T21:08:21.567Z'
+        }, (
+            'Проверьте, что команда `export_data --format ndjson --gzip` выгружает строки по возрастанию id'
+        )